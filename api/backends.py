@@ -0,0 +1,164 @@
+import asyncio
+import time
+import aiohttp
+from plugins.GroupManagerPlugin.api.resilience import NapCatUnavailableError, CircuitOpenError
+
+
+class Backend:
+    """单个 NapCat 实例（一个机器人账号）及其健康状态"""
+
+    def __init__(self, name: str, transport):
+        self.name = name
+        self.transport = transport
+        self.self_id = None
+        self.groups = set()  # 该账号所在的群
+        self.groups_refreshed = 0.0
+        self.healthy = True
+        self.inflight = 0
+        self.last_error = ""
+        self.checked_at = 0.0
+        self.events = False  # 是否通过 WebSocket 接收 NapCat 上报事件
+
+    @property
+    def breaker(self):
+        """后端传输层的熔断器，未启用熔断策略时为 None"""
+        return getattr(self.transport, "breaker", None)
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and (self.breaker is None or self.breaker.state != "open")
+
+
+class BackendPool:
+    """
+    多 NapCat 后端的路由层，对外提供与单个传输层相同的 request 接口。
+    请求按 group_id 路由到账号所在群的后端，撤回消息、处理加群请求等参数中没有群号的接口由调用方给出
+    group_id 或 self_id（上报事件的账号）作为路由依据；有多个可用后端时选择进行中请求最少的一个；
+    启用 failover 时，后端不可用会转移到下一个候选后端。后台定期做健康检查并刷新各账号的群列表。
+    """
+
+    def __init__(self, backends: list, failover: bool = True, health_interval: float = 30,
+                 group_refresh_interval: float = 300):
+        self.backends = backends
+        self.failover = failover
+        self.health_interval = health_interval
+        self.group_refresh_interval = group_refresh_interval
+        self._task = None
+        self.checked = asyncio.Event()  # 首轮健康检查（含群列表获取）完成后设置
+        for backend in backends:
+            backend.transport.add_event_listener(self._membership_listener(backend))
+
+    async def start(self):
+        for backend in self.backends:
+            await backend.transport.start()
+        if self._task is None:
+            self._task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for backend in self.backends:
+            await backend.transport.close()
+
+    def add_event_listener(self, callback):
+        for backend in self.backends:
+            backend.transport.add_event_listener(callback)
+
+    def candidates(self, group_id: str = None, self_id: int = None) -> list:
+        """按优先级返回可处理该群请求的后端：可用且负载低的在前，不可用的垫底作为最后尝试"""
+        pool = self.backends
+        if self_id is not None:
+            # 只有上报事件的账号能处理该事件（如加群请求的 flag）
+            pool = [b for b in self.backends if b.self_id == self_id] or self.backends
+        elif group_id is not None:
+            # 群列表尚未获取到时不限制后端
+            pool = [b for b in self.backends if group_id in b.groups] or self.backends
+        available = sorted((b for b in pool if b.available), key=lambda b: b.inflight)
+        return available + [b for b in pool if not b.available]
+
+    async def request(self, method: str, action: str, data: dict = None, error: str = "请求失败", timeout: float = None,
+                      group_id: str = None, self_id: int = None):
+        """group_id / self_id 为路由依据，不发送给 NapCat；未给出 group_id 时取 data 中的群号"""
+        if group_id is None:
+            group_id = (data or {}).get("group_id")
+        candidates = self.candidates(None if group_id is None else str(group_id), self_id)
+        if not self.failover:
+            candidates = candidates[:1]
+        last_error = None
+        for backend in candidates:
+            backend.inflight += 1
+            try:
+                return await backend.transport.request(method, action, data, error, timeout)
+            except (NapCatUnavailableError, aiohttp.ClientConnectorError) as e:
+                last_error = e
+                backend.last_error = str(e)
+                # 写请求只有在确定未发出时（熔断拒绝、无法建立连接）才转移，避免重复执行
+                if method != "GET" and not self._not_sent(e):
+                    raise
+            finally:
+                backend.inflight -= 1
+        raise last_error
+
+    @staticmethod
+    def _not_sent(error: Exception) -> bool:
+        if isinstance(error, (CircuitOpenError, aiohttp.ClientConnectorError)):
+            return True
+        return isinstance(error.__cause__, aiohttp.ClientConnectorError)
+
+    async def check(self, backend: Backend):
+        """检查后端是否在线，并按间隔刷新该账号所在的群"""
+        try:
+            info = await backend.transport.request("GET", "get_login_info", None, "健康检查失败")
+            backend.self_id = (info.get('data') or {}).get('user_id', backend.self_id)
+            if time.monotonic() - backend.groups_refreshed >= self.group_refresh_interval or not backend.groups:
+                result = await backend.transport.request("GET", "get_group_list", None, "获取群列表失败")
+                backend.groups = {str(g['group_id']) for g in result.get('data') or []}
+                backend.groups_refreshed = time.monotonic()
+            if not backend.healthy:
+                print(f"NapCat 后端 {backend.name} 已恢复")
+            backend.healthy = True
+            backend.last_error = ""
+        except Exception as e:
+            if backend.healthy:
+                print(f"NapCat 后端 {backend.name} 健康检查失败: {str(e)}")
+            backend.healthy = False
+            backend.last_error = str(e)
+        backend.checked_at = time.time()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.gather(*(self.check(b) for b in self.backends))
+            self.checked.set()
+            await asyncio.sleep(self.health_interval)
+
+    def _membership_listener(self, backend: Backend):
+        """根据机器人自身入群/退群事件维护后端的群列表"""
+        async def on_event(event: dict):
+            if event.get('post_type') != 'notice' or event.get('user_id') != backend.self_id:
+                return
+            group_id = str(event.get('group_id'))
+            if event.get('notice_type') == 'group_increase':
+                backend.groups.add(group_id)
+            elif event.get('notice_type') == 'group_decrease':
+                backend.groups.discard(group_id)
+        return on_event
+
+    def stats(self) -> list:
+        """返回各后端状态"""
+        return [
+            {
+                "name": b.name,
+                "self_id": b.self_id,
+                "healthy": b.healthy,
+                "breaker": b.breaker.state if b.breaker is not None else None,
+                "inflight": b.inflight,
+                "groups": len(b.groups),
+                "last_error": b.last_error
+            }
+            for b in self.backends
+        ]
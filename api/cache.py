@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    读接口结果缓存。以 (接口名, 群号) 为键，每个接口单独设置过期时间，超出容量时按 LRU 淘汰。
+    """
+
+    def __init__(self, maxsize: int = 512, default_ttl: float = 60, ttl: dict = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self.ttl = ttl or {}
+        self._data = OrderedDict()  # (endpoint, group_id) -> (过期时间, 结果)
+        self._counters = {}  # endpoint -> [命中, 未命中]
+
+    def get(self, endpoint: str, group_id: str):
+        """读取缓存，过期或不存在时返回 None"""
+        key = (endpoint, str(group_id))
+        counter = self._counters.setdefault(endpoint, [0, 0])
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            counter[1] += 1
+            return None
+        self._data.move_to_end(key)
+        counter[0] += 1
+        return entry[1]
+
+    def set(self, endpoint: str, group_id: str, value):
+        ttl = self.ttl.get(endpoint, self.default_ttl)
+        if ttl <= 0:
+            return
+        key = (endpoint, str(group_id))
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, endpoint: str, group_id: str):
+        self._data.pop((endpoint, str(group_id)), None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """返回缓存条目数及各接口命中/未命中次数"""
+        hits = sum(c[0] for c in self._counters.values())
+        misses = sum(c[1] for c in self._counters.values())
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": hits,
+            "misses": misses,
+            "endpoints": {name: {"hits": c[0], "misses": c[1]} for name, c in self._counters.items()}
+        }
@@ -1,9 +1,36 @@
-import aiohttp
-import json
+import os
+from urllib.parse import urlparse
+from plugins.GroupManagerPlugin.api.cache import TTLCache
+from plugins.GroupManagerPlugin.api.singleflight import SingleFlight
+from plugins.GroupManagerPlugin.api.transport import HttpTransport
 
 class GroupAPI:
-    def __init__(self, host: str, port: int):
-        self.url = f"http://{host}:{port}"
+    def __init__(self, transport: HttpTransport, cache: TTLCache = None):
+        self.transport = transport
+        self.cache = cache
+        # 相同接口、相同参数的并发读请求共享同一次调用
+        self.singleflight = SingleFlight()
+        # 本地媒体缓存，设置后上传的文件以 file:// 路径交给 NapCat
+        self.media = None
+
+    async def _get(self, action: str, group_id: str, error: str):
+        """按群查询的读接口，启用缓存时优先返回未过期的结果"""
+        if self.cache is not None:
+            result = self.cache.get(action, group_id)
+            if result is not None:
+                return result
+        result = await self.singleflight.do(
+            (action, str(group_id)),
+            lambda: self.transport.request("GET", action, {"group_id": group_id}, error)
+        )
+        if self.cache is not None:
+            self.cache.set(action, group_id, result)
+        return result
+
+    def invalidate(self, action: str, group_id: str):
+        """写操作后丢弃受影响的缓存条目"""
+        if self.cache is not None:
+            self.cache.invalidate(action, group_id)
 
     async def mute_group_member(self, group_id: str, user_id: str, duration: int):
         """
@@ -15,13 +42,9 @@ class GroupAPI:
             "user_id": user_id,
             "duration": duration
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/set_group_ban", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"禁言失败: {result.get('message', '未知错误')}")
-                return result
+        result = await self.transport.request("POST", "set_group_ban", payload, "禁言失败")
+        self.invalidate("get_group_shut_list", group_id)
+        return result
 
     async def send_group_notice(self, group_id: str, content: str):
         """
@@ -34,13 +57,7 @@ class GroupAPI:
             "is_top": True,
             "send_to_new_member": True
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/_send_group_notice", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"设置公告失败: {result.get('message', '未知错误')}")
-                return result
+        return await self.transport.request("POST", "_send_group_notice", payload, "设置公告失败")
 
     async def set_essence_message(self, group_id: str, message_id: str):
         """
@@ -51,64 +68,68 @@ class GroupAPI:
             "group_id": group_id,
             "message_id": message_id
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/set_essence_msg", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"设置精华消息失败: {result.get('message', '未知错误')}")
-                return result
+        result = await self.transport.request("POST", "set_essence_msg", payload, "设置精华消息失败")
+        self.invalidate("get_essence_msg_list", group_id)
+        return result
 
     async def get_essence_msg_list(self, group_id: str):
         """
         获取群精华消息列表。
         参考: /get_essence_msg_list
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.url}/get_essence_msg_list?group_id={group_id}") as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"获取精华消息列表失败: {result.get('message', '未知错误')}")
-                # 返回 talkative_list 作为 data 字段以保持兼容
-                if result.get('data') and 'talkative_list' in result['data']:
-                    result['data'] = result['data']['talkative_list']
-                return result
+        result = await self._get("get_essence_msg_list", group_id, "获取精华消息列表失败")
+        # 返回 talkative_list 作为 data 字段以保持兼容
+        if result.get('data') and 'talkative_list' in result['data']:
+            result['data'] = result['data']['talkative_list']
+        return result
 
     async def get_group_honor_info(self, group_id: str):
         """
         获取群荣誉信息（如龙王、群聊之火等）。
         参考: /get_group_honor_info
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.url}/get_group_honor_info?group_id={group_id}") as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"获取群荣誉信息失败: {result.get('message', '未知错误')}")
-                return result
+        return await self._get("get_group_honor_info", group_id, "获取群荣誉信息失败")
 
     async def get_group_info(self, group_id: str):
         """
         获取群信息。
         参考: /get_group_info
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.url}/get_group_info?group_id={group_id}") as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"获取群信息失败: {result.get('message', '未知错误')}")
-                return result
+        return await self._get("get_group_info", group_id, "获取群信息失败")
 
     async def get_group_member_list(self, group_id: str):
         """
         获取群成员列表。
         参考: /get_group_member_list
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.url}/get_group_member_list?group_id={group_id}") as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"获取成员列表失败: {result.get('message', '未知错误')}")
-                return result
+        return await self._get("get_group_member_list", group_id, "获取成员列表失败")
+
+    async def get_group_member_info(self, group_id: str, user_id: str):
+        """
+        获取单个群成员信息。
+        参考: /get_group_member_info
+        """
+        payload = {
+            "group_id": group_id,
+            "user_id": user_id
+        }
+        return await self.singleflight.do(
+            ("get_group_member_info", str(group_id), str(user_id)),
+            lambda: self.transport.request("GET", "get_group_member_info", payload, "获取成员信息失败")
+        )
+
+    async def get_stranger_info(self, user_id: str):
+        """
+        获取 QQ 账号资料（等级、注册时间等）。
+        参考: /get_stranger_info
+        """
+        payload = {
+            "user_id": user_id
+        }
+        return await self.singleflight.do(
+            ("get_stranger_info", str(user_id)),
+            lambda: self.transport.request("GET", "get_stranger_info", payload, "获取账号资料失败")
+        )
 
     async def kick_group_member(self, group_id: str, user_id: str, reject_add_request: bool = False):
         """
@@ -120,13 +141,9 @@ class GroupAPI:
             "user_id": user_id,
             "reject_add_request": reject_add_request
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/set_group_kick", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"踢出成员失败: {result.get('message', '未知错误')}")
-                return result
+        result = await self.transport.request("POST", "set_group_kick", payload, "踢出成员失败")
+        self.invalidate("get_group_member_list", group_id)
+        return result
 
     async def set_group_admin(self, group_id: str, user_id: str, enable: bool):
         """
@@ -138,13 +155,9 @@ class GroupAPI:
             "user_id": user_id,
             "enable": enable
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/set_group_admin", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"设置管理员失败: {result.get('message', '未知错误')}")
-                return result
+        result = await self.transport.request("POST", "set_group_admin", payload, "设置管理员失败")
+        self.invalidate("get_group_member_list", group_id)
+        return result
 
     async def set_group_name(self, group_id: str, group_name: str):
         """
@@ -155,13 +168,9 @@ class GroupAPI:
             "group_id": group_id,
             "group_name": group_name
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/set_group_name", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"设置群名称失败: {result.get('message', '未知错误')}")
-                return result
+        result = await self.transport.request("POST", "set_group_name", payload, "设置群名称失败")
+        self.invalidate("get_group_info", group_id)
+        return result
 
     async def set_group_special_title(self, group_id: str, user_id: str, special_title: str, duration: int = -1):
         """
@@ -174,37 +183,21 @@ class GroupAPI:
             "special_title": special_title,
             "duration": duration  # -1 表示永久
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/set_group_special_title", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"设置特殊头衔失败: {result.get('message', '未知错误')}")
-                return result
+        return await self.transport.request("POST", "set_group_special_title", payload, "设置特殊头衔失败")
 
     async def get_group_at_all_remain(self, group_id: str):
         """
         获取群@全体剩余次数。
         参考: /get_group_at_all_remain
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.url}/get_group_at_all_remain?group_id={group_id}") as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"获取@全体剩余次数失败: {result.get('message', '未知错误')}")
-                return result
+        return await self._get("get_group_at_all_remain", group_id, "获取@全体剩余次数失败")
 
     async def get_group_shut_list(self, group_id: str):
         """
         获取群禁言列表。
         参考: /get_group_shut_list
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.url}/get_group_shut_list?group_id={group_id}") as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"获取禁言列表失败: {result.get('message', '未知错误')}")
-                return result
+        return await self._get("get_group_shut_list", group_id, "获取禁言列表失败")
 
     async def send_group_poke(self, group_id: str, user_id: str):
         """
@@ -215,13 +208,7 @@ class GroupAPI:
             "group_id": group_id,
             "user_id": user_id
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/group_poke", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"发送戳一戳失败: {result.get('message', '未知错误')}")
-                return result
+        return await self.transport.request("POST", "group_poke", payload, "发送戳一戳失败")
 
     async def send_like(self, user_id: str, times: int):
         """
@@ -232,30 +219,24 @@ class GroupAPI:
             "user_id": user_id,
             "times": times
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/send_like", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"点赞失败: {result.get('message', '未知错误')}")
-                return result
+        return await self.transport.request("POST", "send_like", payload, "点赞失败")
 
-    async def handle_group_request(self, flag: str, approve: bool):
+    async def handle_group_request(self, flag: str, approve: bool, reason: str = "", sub_type: str = "add",
+                                   group_id: str = None, self_id: int = None):
         """
-        处理加群请求。
+        处理加群请求。reason 为拒绝理由，仅在拒绝时有效；
+        self_id 为收到该请求的账号，请求由该账号所在的后端处理，未知时按 group_id 路由。
         参考: /set_group_add_request
         """
         payload = {
             "flag": flag,
+            "sub_type": sub_type,
             "approve": approve
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/set_group_add_request", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"处理加群请求失败: {result.get('message', '未知错误')}")
-                return result
+        if reason and not approve:
+            payload["reason"] = reason
+        return await self.transport.request("POST", "set_group_add_request", payload, "处理加群请求失败",
+                                            group_id=group_id, self_id=self_id)
 
     async def move_group_file(self, group_id: str, file_id: str, target_dir: str):
         """
@@ -267,30 +248,30 @@ class GroupAPI:
             "file_id": file_id,
             "target_dir": target_dir
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/move_group_file", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"移动群文件失败: {result.get('message', '未知错误')}")
-                return result
+        return await self.transport.request("POST", "move_group_file", payload, "移动群文件失败")
 
     async def upload_group_file(self, group_id: str, file_url: str):
         """
-        上传群文件。
+        上传群文件。启用媒体缓存时先下载到本地，以本地文件上传。
         参考: /upload_group_file
         """
-        payload = {
-            "group_id": group_id,
-            "url": file_url
-        }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/upload_group_file", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"上传群文件失败: {result.get('message', '未知错误')}")
-                return result
+        async def upload(address: str):
+            if address == file_url:
+                payload = {
+                    "group_id": group_id,
+                    "url": file_url
+                }
+            else:
+                payload = {
+                    "group_id": group_id,
+                    "file": address,
+                    "name": os.path.basename(urlparse(file_url).path) or os.path.basename(address)
+                }
+            return await self.transport.request("POST", "upload_group_file", payload, "上传群文件失败")
+
+        if self.media is not None:
+            return await self.media.send(file_url, upload)
+        return await upload(file_url)
 
     async def set_typing_status(self, group_id: str):
         """
@@ -300,10 +281,4 @@ class GroupAPI:
         payload = {
             "group_id": group_id
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/set_typing_status", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"设置输入状态失败: {result.get('message', '未知错误')}")
-                return result
\ No newline at end of file
+        return await self.transport.request("POST", "set_typing_status", payload, "设置输入状态失败")
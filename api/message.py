@@ -1,43 +1,57 @@
-import aiohttp
-import json
 from pkg.platform.types import MessageChain, Plain, Image, Voice
+from plugins.GroupManagerPlugin.api.transport import HttpTransport
+
+# ocr_image 未返回文本时的结果
+OCR_NO_TEXT = "无法识别文本"
 
 class MessageAPI:
-    def __init__(self, host: str, port: int):
-        self.url = f"http://{host}:{port}"
+    def __init__(self, transport: HttpTransport):
+        self.transport = transport
+        # 发送调度器，设置后 send_group_msg 经由其排队限速
+        self.outbox = None
+        # 本地媒体缓存，设置后图片与语音以 file:// 路径发送
+        self.media = None
+
+    async def send_group_msg(self, group_id: str, message_chain: MessageChain, wait: bool = True, coalesce: bool = False):
+        """
+        发送群消息。启用发送调度器时排队限速，wait 为 False 时不等待发送完成，
+        coalesce 为 True 时纯文本消息可能与同一群的相邻确认消息合并。
+        参考: /send_group_msg
+        """
+        if self.outbox is not None:
+            return await self.outbox.send(group_id, message_chain, wait, coalesce)
+        return await self.deliver_group_msg(group_id, message_chain)
 
-    async def send_group_msg(self, group_id: str, message_chain: MessageChain):
+    async def deliver_group_msg(self, group_id: str, message_chain: MessageChain):
         """
-        发送群消息。
+        直接发送群消息，不经过发送调度器。
         参考: /send_group_msg
         """
         payload = {
             "group_id": group_id,
             "message": message_chain.to_dict() if hasattr(message_chain, 'to_dict') else str(message_chain)
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/send_group_msg", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"发送消息失败: {result.get('message', '未知错误')}")
-                return result
+        return await self.transport.request("POST", "send_group_msg", payload, "发送消息失败")
 
     async def send_group_image(self, group_id: str, image_url: str):
         """
-        发送群图片。
+        发送群图片。启用媒体缓存时先下载到本地，重复发送同一图片无需再次下载。
         参考: /send_group_msg
         """
-        message_chain = MessageChain([Image(url=image_url)])
-        return await self.send_group_msg(group_id, message_chain)
+        send = lambda url: self.send_group_msg(group_id, MessageChain([Image(url=url)]))
+        if self.media is not None:
+            return await self.media.send(image_url, send)
+        return await send(image_url)
 
     async def send_group_voice(self, group_id: str, voice_url: str):
         """
-        发送群语音。
+        发送群语音。启用媒体缓存时先下载到本地。
         参考: /send_group_msg
         """
-        message_chain = MessageChain([Voice(url=voice_url)])
-        return await self.send_group_msg(group_id, message_chain)
+        send = lambda url: self.send_group_msg(group_id, MessageChain([Voice(url=url)]))
+        if self.media is not None:
+            return await self.media.send(voice_url, send)
+        return await send(voice_url)
 
     async def send_group_forward_message(self, group_id: str, messages: list, sender_id: int):
         """
@@ -61,13 +75,7 @@ class MessageAPI:
             "group_id": group_id,
             "messages": forward_messages
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/send_group_forward_msg", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"发送合并转发消息失败: {result.get('message', '未知错误')}")
-                return result
+        return await self.transport.request("POST", "send_group_forward_msg", payload, "发送合并转发消息失败")
 
     async def recall_group_message(self, group_id: str, message_id: str):
         """
@@ -77,13 +85,19 @@ class MessageAPI:
         payload = {
             "message_id": message_id
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/delete_msg", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"撤回消息失败: {result.get('message', '未知错误')}")
-                return result
+        # delete_msg 不带群号，按 group_id 路由到所在群的后端
+        return await self.transport.request("POST", "delete_msg", payload, "撤回消息失败", group_id=group_id)
+
+    async def get_msg(self, group_id: str, message_id: str):
+        """
+        获取群消息内容，返回消息段列表。
+        参考: /get_msg
+        """
+        payload = {
+            "message_id": message_id
+        }
+        result = await self.transport.request("GET", "get_msg", payload, "获取消息失败", group_id=group_id)
+        return (result.get("data") or {}).get("message") or []
 
     async def ocr_image(self, image_url: str):
         """
@@ -93,13 +107,8 @@ class MessageAPI:
         payload = {
             "image_url": image_url
         }
-        headers = {'Content-Type': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}/ocr_image", data=json.dumps(payload), headers=headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    raise Exception(f"OCR识别失败: {result.get('message', '未知错误')}")
-                return result.get('text', '无法识别文本')
+        result = await self.transport.request("POST", "ocr_image", payload, "OCR识别失败")
+        return result.get('text') or OCR_NO_TEXT
 
     async def send_group_text(self, group_id: str, content: str):
         """
@@ -0,0 +1,139 @@
+import asyncio
+import random
+import time
+import aiohttp
+
+
+class NapCatUnavailableError(Exception):
+    """NapCat 无法访问（连接失败或超时），区别于 NapCat 正常返回的业务错误"""
+
+
+class CircuitOpenError(NapCatUnavailableError):
+    """熔断器处于打开状态，请求未发出即被拒绝"""
+
+
+class CircuitBreaker:
+    """
+    熔断器。连续失败达到 failure_threshold 次后打开，期间请求直接失败；
+    recovery_timeout 秒后进入半开状态，放行一个探测请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = ""
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """判断当前是否允许发起请求"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.last_error = error
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                print(f"NapCat 熔断器打开: {error}")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def cancel_probe(self):
+        """探测请求被取消时释放半开状态的探测名额"""
+        self._probing = False
+
+    def retry_after(self) -> float:
+        """熔断打开时距离下一次探测的秒数"""
+        if self.state != self.OPEN:
+            return 0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+
+class ResilientTransport:
+    """
+    为任意传输层（HTTP / WebSocket）附加超时、重试与熔断策略。
+    超时按接口单独配置；只有幂等的读请求（GET）会按指数退避重试；
+    连接失败与超时计入熔断器，NapCat 返回的业务错误不计入。
+    """
+
+    def __init__(self, inner, timeout: float = 10, timeouts: dict = None, retries: int = 2,
+                 backoff: float = 0.2, max_backoff: float = 2, failure_threshold: int = 5,
+                 recovery_timeout: float = 30):
+        self.inner = inner
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+
+    async def start(self):
+        await self.inner.start()
+
+    async def close(self):
+        await self.inner.close()
+
+    def add_event_listener(self, callback):
+        self.inner.add_event_listener(callback)
+
+    async def request(self, method: str, action: str, data: dict = None, error: str = "请求失败", timeout: float = None,
+                      **route):
+        # route 为多后端的路由依据，由外层 BackendPool 使用，这里只包装单个后端
+        timeout = timeout or self.timeouts.get(action, self.timeout)
+        attempts = 1 + self.retries if method == "GET" else 1
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"{error}: NapCat 暂不可用，已熔断，约 {self.breaker.retry_after():.0f} 秒后重试"
+                )
+            try:
+                result = await asyncio.wait_for(self.inner.request(method, action, data, error, timeout), timeout)
+            except (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError) as e:
+                reason = "请求超时" if isinstance(e, asyncio.TimeoutError) else f"连接失败 {str(e)}"
+                self.breaker.record_failure(f"{action}: {reason}")
+                if attempt + 1 >= attempts:
+                    raise NapCatUnavailableError(f"{error}: NapCat {reason}") from e
+                # 指数退避并加入随机抖动，避免重试同时涌向 NapCat
+                delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+                await asyncio.sleep(delay * random.uniform(0.5, 1))
+                continue
+            except asyncio.CancelledError:
+                self.breaker.cancel_probe()
+                raise
+            except Exception:
+                # NapCat 已正常响应，业务错误不影响熔断状态
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> dict:
+        """返回熔断器状态"""
+        return {
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "rejected": self.breaker.rejected,
+            "retry_after": self.breaker.retry_after(),
+            "last_error": self.breaker.last_error
+        }
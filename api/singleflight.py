@@ -0,0 +1,26 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    合并相同的并发请求：同一 key 同一时间只发起一次调用，其余调用方等待并共享其结果。
+    """
+
+    def __init__(self):
+        self._inflight = {}  # key -> Future
+        self.shared = 0  # 被合并（未实际发出）的调用次数
+
+    async def do(self, key, fn):
+        """以 key 去重执行 fn()，fn 为返回协程的无参函数"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield 保证单个调用方被取消时不会取消其他调用方共享的请求
+        return await asyncio.shield(future)
+
+    def __len__(self):
+        return len(self._inflight)
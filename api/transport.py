@@ -0,0 +1,66 @@
+import aiohttp
+
+
+class HttpTransport:
+    """
+    NapCat HTTP 传输层。
+    GroupAPI 与 MessageAPI 共享同一个长连接 ClientSession，复用 keep-alive 连接。
+    """
+
+    def __init__(self, host: str, port: int, limit: int = 100, limit_per_host: int = 30,
+                 keepalive_timeout: float = 30, timeout: float = 10):
+        self.url = f"http://{host}:{port}"
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._session = None
+
+    async def start(self):
+        """创建共享会话，重复调用无副作用"""
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'Content-Type': 'application/json'}
+        )
+
+    @property
+    def session(self):
+        """共享的 ClientSession，供 WebSocket 等传输复用连接器"""
+        return self._session
+
+    def add_event_listener(self, callback):
+        """HTTP 模式下 NapCat 不推送事件，仅为与 WebSocket 传输保持接口一致"""
+        pass
+
+    async def close(self):
+        """关闭共享会话，释放连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(self, method: str, action: str, data: dict = None, error: str = "请求失败", timeout: float = None,
+                      **route):
+        """
+        调用 NapCat 接口。GET 请求的 data 作为查询参数，POST 请求的 data 作为 JSON 请求体。
+        timeout 覆盖本次请求的超时时间（秒）；route 为多后端的路由依据（group_id / self_id），单个后端忽略。
+        """
+        if self._session is None or self._session.closed:
+            await self.start()
+        kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+        if method == "GET":
+            request = self._session.get(f"{self.url}/{action}", params=data, **kwargs)
+        else:
+            request = self._session.post(f"{self.url}/{action}", json=data or {}, **kwargs)
+        async with request as response:
+            result = await response.json()
+            if response.status != 200:
+                raise Exception(f"{error}: {result.get('message', '未知错误')}")
+            return result
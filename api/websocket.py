@@ -0,0 +1,135 @@
+import asyncio
+import itertools
+import json
+import aiohttp
+from plugins.GroupManagerPlugin.api.transport import HttpTransport
+
+
+class WebSocketTransport:
+    """
+    NapCat OneBot v11 WebSocket 传输层。
+    在一条持久连接上按 echo 复用并发请求，连接不可用时回退到 HTTP 传输层。
+    """
+
+    def __init__(self, fallback: HttpTransport, host: str, port: int, access_token: str = "",
+                 reconnect_interval: float = 3, pending_policy: str = "replay"):
+        self.url = f"ws://{host}:{port}"
+        self.fallback = fallback
+        self.access_token = access_token
+        self.reconnect_interval = reconnect_interval
+        # replay: 重连后重发未完成的读请求（GET），写请求可能已执行，断线时立即失败；fail: 断线时全部立即失败
+        self.pending_policy = pending_policy
+        self._ws = None
+        self._task = None
+        self._echo = itertools.count(1)
+        self._pending = {}  # echo -> (future, frame)，frame 为 None 表示写请求，不可重发
+        self._listeners = []
+        self._event_tasks = set()
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed
+
+    def add_event_listener(self, callback):
+        """注册事件回调，NapCat 通过同一连接推送的上报事件（notice/request 等）会分发给它"""
+        self._listeners.append(callback)
+
+    async def start(self):
+        await self.fallback.start()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+        self._fail_pending("WebSocket 传输已关闭")
+        await self.fallback.close()
+
+    async def request(self, method: str, action: str, data: dict = None, error: str = "请求失败", timeout: float = None,
+                      **route):
+        """
+        通过 WebSocket 调用 NapCat 接口，method 仅为与 HTTP 传输层保持一致。
+        未连接时直接回退到 HTTP。route 为多后端的路由依据，单个连接忽略。
+        """
+        if not self.connected:
+            return await self.fallback.request(method, action, data, error, timeout)
+        echo = str(next(self._echo))
+        frame = {"action": action, "params": data or {}, "echo": echo}
+        future = asyncio.get_running_loop().create_future()
+        self._pending[echo] = (future, frame if method == "GET" else None)
+        try:
+            try:
+                await self._ws.send_json(frame)
+            except (ConnectionError, RuntimeError, aiohttp.ClientError):
+                # 发送失败说明连接已断开，本次请求改走 HTTP
+                self._pending.pop(echo, None)
+                return await self.fallback.request(method, action, data, error, timeout)
+            result = await asyncio.wait_for(future, timeout or self.fallback.timeout)
+        finally:
+            self._pending.pop(echo, None)
+        if result.get('status') == 'failed':
+            raise Exception(f"{error}: {result.get('message') or result.get('wording') or '未知错误'}")
+        return result
+
+    async def _run(self):
+        """维持连接：读取响应帧与事件帧，断线后按间隔重连"""
+        headers = {"Authorization": f"Bearer {self.access_token}"} if self.access_token else None
+        while True:
+            try:
+                async with self.fallback.session.ws_connect(self.url, headers=headers, heartbeat=30) as ws:
+                    self._ws = ws
+                    print(f"NapCat WebSocket 已连接: {self.url}")
+                    await self._replay_pending()
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self._on_frame(json.loads(msg.data))
+                        elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSE):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"NapCat WebSocket 连接失败: {str(e)}")
+            self._ws = None
+            # 写请求（发消息、踢人、禁言等）可能已在断线前执行，重发会重复执行，始终立即失败
+            self._fail_pending("WebSocket 连接已断开", writes_only=self.pending_policy == "replay")
+            await asyncio.sleep(self.reconnect_interval)
+
+    def _on_frame(self, frame: dict):
+        echo = frame.get('echo')
+        if echo is not None:
+            entry = self._pending.get(str(echo))
+            if entry and not entry[0].done():
+                entry[0].set_result(frame)
+            return
+        if 'post_type' in frame:
+            for callback in self._listeners:
+                task = asyncio.create_task(self._dispatch(callback, frame))
+                self._event_tasks.add(task)
+                task.add_done_callback(self._event_tasks.discard)
+
+    async def _dispatch(self, callback, frame: dict):
+        try:
+            await callback(frame)
+        except Exception as e:
+            print(f"处理 NapCat 事件失败: {str(e)}")
+
+    async def _replay_pending(self):
+        for future, frame in list(self._pending.values()):
+            if frame is not None and not future.done():
+                await self._ws.send_json(frame)
+
+    def _fail_pending(self, reason: str, writes_only: bool = False):
+        for echo, (future, frame) in list(self._pending.items()):
+            if writes_only and frame is not None:
+                continue
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+            del self._pending[echo]
@@ -0,0 +1,256 @@
+"""
+GroupManagerPlugin 性能测试。
+
+启动本地 NapCat 替身服务器（bench/stub_napcat.py），构造 GroupMessageReceived 事件直接驱动
+GroupManagerPlugin.group_command_sent，统计命令吞吐、各命令延迟分位数、建立的连接数和内存峰值。
+需要在 LangBot 根目录下运行，以便导入 pkg 与 plugins.GroupManagerPlugin：
+
+    python plugins/GroupManagerPlugin/bench/run_bench.py --commands 2000 --concurrency 50 --latency 5
+    python plugins/GroupManagerPlugin/bench/run_bench.py --json bench.json
+    python plugins/GroupManagerPlugin/bench/run_bench.py --baseline bench.json --tolerance 0.15
+
+指定 --baseline 时，吞吐下降或 p95 延迟上升超过 tolerance 即以退出码 1 结束，可用于发布前检查。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.getcwd())
+
+import aiohttp
+from pkg.platform.types import MessageChain, Plain
+from pkg.plugin.events import GroupMessageReceived
+from plugins.GroupManagerPlugin.main import GroupManagerPlugin
+
+BENCH_ADMIN = 10001
+STUB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_napcat.py")
+
+# 命令名 -> 命令模板，{qq} 与 {n} 在生成事件时替换
+COMMANDS = {
+    "info": "/group info",
+    "members": "/group members",
+    "search": "/group members search card1",
+    "mutelist": "/group mutelist",
+    "honor": "/group honor",
+    "essencelist": "/group essencelist",
+    "atallcount": "/group atallcount",
+    "mute": "/group mute {qq} 1",
+    "unmute": "/group unmute {qq}",
+    "kick": "/group kick {qq}",
+    "setname": "/group setname bench{n}",
+}
+
+
+# 持久化数据的配置段，测试时全部指向临时目录，不读写 data/ 下的真实数据
+DATA_SECTIONS = {
+    "audit": "audit.db",
+    "scheduler": "schedule.json",
+    "keyword_filter": "keywords.json",
+    "broadcast": "broadcasts.json",
+    "media": "media",
+    "ocr": "ocr_cache.json",
+    "warmup": "activity.json"
+}
+
+
+def make_plugin_class(port: int, throttled: bool, data_dir: str):
+    class BenchPlugin(GroupManagerPlugin):
+        def load_config(self) -> dict:
+            config = super().load_config()
+            config["admin"] = [BENCH_ADMIN]
+            config["napcat"]["host"] = "127.0.0.1"
+            config["napcat"]["port"] = port
+            config["backends"] = []
+            config["websocket"]["enable"] = False
+            config["metrics"]["prometheus_file"] = ""
+            config["warmup"]["enable"] = False
+            for section, name in DATA_SECTIONS.items():
+                config[section]["path"] = os.path.join(data_dir, name)
+            if not throttled:
+                # 默认不限速，测量插件自身的处理能力；合并窗口保持配置值
+                config["outbox"].update(group_rate=1e9, group_burst=10 ** 9, global_rate=1e9,
+                                        global_burst=10 ** 9, max_queue=10 ** 9)
+            return config
+    return BenchPlugin
+
+
+def make_context(group_id: int, text: str):
+    event = GroupMessageReceived(
+        launcher_type="group",
+        launcher_id=group_id,
+        sender_id=BENCH_ADMIN,
+        message_chain=MessageChain([Plain(text=text)])
+    )
+    return SimpleNamespace(event=event)
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def wait_for_stub(url: str, timeout: float = 10):
+    async with aiohttp.ClientSession() as session:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                async with session.get(f"{url}/_stats") as response:
+                    return await response.json()
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+async def run(args) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    stub = subprocess.Popen([
+        sys.executable, STUB_PATH, "--port", str(args.port), "--latency", str(args.latency),
+        "--jitter", str(args.jitter), "--error-rate", str(args.error_rate), "--members", str(args.members)
+    ])
+    data_dir = tempfile.TemporaryDirectory(prefix="gmp-bench-")
+    try:
+        await wait_for_stub(url)
+        if args.tracemalloc:
+            tracemalloc.start()
+        plugin = make_plugin_class(args.port, args.throttled, data_dir.name)(None)
+        await plugin.initialize()
+
+        mix = [name.strip() for name in args.mix.split(",") if name.strip()]
+        groups = [200000 + i for i in range(args.groups)]
+        latencies = {name: [] for name in mix}
+        noise_latencies = []
+        semaphore = asyncio.Semaphore(args.concurrency)
+        rng = random.Random(args.seed)
+
+        async def one(n: int):
+            group_id = rng.choice(groups)
+            if rng.random() < args.noise:
+                name, text = None, f"普通聊天消息 {n}"
+            else:
+                name = rng.choice(mix)
+                text = COMMANDS[name].format(qq=10000 + rng.randrange(args.members), n=n)
+            ctx = make_context(group_id, text)
+            async with semaphore:
+                started = time.perf_counter()
+                await plugin.group_command_sent(ctx)
+                elapsed = time.perf_counter() - started
+            (noise_latencies if name is None else latencies[name]).append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(args.commands)))
+        duration = time.perf_counter() - started
+
+        if args.tracemalloc:
+            peak_memory = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+        else:
+            peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        await plugin.destroy()
+        stub_stats = await wait_for_stub(url)
+    finally:
+        stub.terminate()
+        data_dir.cleanup()
+        stub.wait()
+
+    commands_done = sum(len(v) for v in latencies.values())
+    return {
+        "messages": args.commands,
+        "commands": commands_done,
+        "duration": duration,
+        "commands_per_second": commands_done / duration if duration else 0,
+        "noise_mean_us": sum(noise_latencies) / len(noise_latencies) * 1e6 if noise_latencies else 0,
+        "sockets_opened": stub_stats["connections"],
+        "napcat_requests": stub_stats["requests"],
+        "napcat_errors": stub_stats["errors"],
+        "peak_memory_mb": peak_memory,
+        "latency": {
+            name: {
+                "count": len(values),
+                "p50": percentile(values, 0.5) * 1000,
+                "p95": percentile(values, 0.95) * 1000,
+                "p99": percentile(values, 0.99) * 1000
+            }
+            for name, values in latencies.items() if values
+        }
+    }
+
+
+def report(result: dict):
+    print(f"消息总数: {result['messages']}, 其中命令: {result['commands']}, 用时 {result['duration']:.2f} 秒")
+    print(f"命令吞吐: {result['commands_per_second']:.1f} 条/秒")
+    print(f"非命令消息平均处理耗时: {result['noise_mean_us']:.1f} 微秒")
+    print(f"NapCat 请求: {result['napcat_requests']}（错误 {result['napcat_errors']}），建立连接: {result['sockets_opened']}")
+    print(f"内存峰值: {result['peak_memory_mb']:.1f} MB")
+    print(f"{'命令':<12}{'次数':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for name, stats in sorted(result["latency"].items()):
+        print(f"{name:<12}{stats['count']:>8}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}")
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """与基线结果比较，返回超出容差的退化项"""
+    regressions = []
+    if result["commands_per_second"] < baseline["commands_per_second"] * (1 - tolerance):
+        regressions.append(
+            f"命令吞吐 {result['commands_per_second']:.1f} 低于基线 {baseline['commands_per_second']:.1f}"
+        )
+    for name, stats in result["latency"].items():
+        base = baseline["latency"].get(name)
+        if base and stats["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(f"{name} p95 {stats['p95']:.2f}ms 高于基线 {base['p95']:.2f}ms")
+    if result["sockets_opened"] > baseline["sockets_opened"] * (1 + tolerance):
+        regressions.append(f"建立连接 {result['sockets_opened']} 多于基线 {baseline['sockets_opened']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GroupManagerPlugin 性能测试")
+    parser.add_argument("--port", type=int, default=3900, help="替身服务器端口")
+    parser.add_argument("--commands", type=int, default=2000, help="发送的消息总数")
+    parser.add_argument("--concurrency", type=int, default=50, help="同时处理的消息数")
+    parser.add_argument("--groups", type=int, default=20, help="涉及的群数量")
+    parser.add_argument("--mix", default=",".join(COMMANDS), help="参与测试的命令，逗号分隔")
+    parser.add_argument("--noise", type=float, default=0.0, help="非命令消息的比例")
+    parser.add_argument("--latency", type=float, default=5, help="替身服务器平均延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=1, help="替身服务器延迟标准差（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0, help="替身服务器错误率")
+    parser.add_argument("--members", type=int, default=3000, help="成员列表规模")
+    parser.add_argument("--throttled", action="store_true", help="保留 settings.yaml 中的发送限速")
+    parser.add_argument("--tracemalloc", action="store_true", help="用 tracemalloc 统计 Python 内存峰值（较慢）")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="将结果写入 JSON 文件")
+    parser.add_argument("--baseline", help="与基线 JSON 比较")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="允许的退化比例")
+    args = parser.parse_args()
+
+    for name in args.mix.split(","):
+        if name.strip() and name.strip() not in COMMANDS:
+            parser.error(f"未知命令 {name}，可选: {', '.join(COMMANDS)}")
+
+    result = asyncio.run(run(args))
+    report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("性能退化:\n" + "\n".join(regressions))
+            sys.exit(1)
+        print("未发现性能退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+本地 NapCat 替身服务器，供性能测试使用。
+
+实现 GroupAPI / MessageAPI 调用的 HTTP 接口，可配置响应延迟、错误率和返回数据规模，
+并通过 /_stats 返回累计请求数与建立过的 TCP 连接数。
+
+    python bench/stub_napcat.py --port 3900 --latency 5 --jitter 2 --error-rate 0.01 --members 3000
+"""
+import argparse
+import asyncio
+import random
+import time
+from aiohttp import web
+
+READ_ENDPOINTS = {
+    "get_group_info", "get_group_member_list", "get_group_member_info", "get_group_shut_list",
+    "get_group_honor_info", "get_essence_msg_list", "get_group_at_all_remain", "get_group_list",
+    "get_login_info", "get_stranger_info", "get_msg"
+}
+WRITE_ENDPOINTS = {
+    "send_group_msg", "send_group_forward_msg", "delete_msg", "set_group_ban", "set_group_kick",
+    "set_group_admin", "set_group_name", "set_group_special_title", "_send_group_notice", "set_essence_msg",
+    "group_poke", "send_like", "set_group_add_request", "move_group_file", "upload_group_file",
+    "set_typing_status", "ocr_image"
+}
+
+
+class StubNapCat:
+    def __init__(self, latency: float, jitter: float, error_rate: float, members: int, muted: int):
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.requests = {}
+        self.errors = 0
+        self._connections = set()
+        self._message_id = 0
+        now = int(time.time())
+        self.member_list = [
+            {
+                "group_id": 0,
+                "user_id": 10000 + i,
+                "nickname": f"member{i}",
+                "card": f"card{i}" if i % 3 == 0 else "",
+                "role": "owner" if i == 0 else ("admin" if i < 5 else "member"),
+                "level": str(i % 100),
+                "join_time": now - 86400 * (i % 365),
+                "last_sent_time": now - 3600 * (i % 2000),
+                "title": ""
+            }
+            for i in range(members)
+        ]
+        self.shut_list = [
+            {"user_id": 10000 + i, "nickname": f"member{i}", "shut_up_timestamp": now + 600}
+            for i in range(min(muted, members))
+        ]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        action = request.match_info["action"]
+        self._connections.add(request.transport)
+        self.requests[action] = self.requests.get(action, 0) + 1
+        data = await request.json() if request.method == "POST" else dict(request.query)
+        delay = max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        if delay:
+            await asyncio.sleep(delay)
+        if action not in READ_ENDPOINTS and action not in WRITE_ENDPOINTS:
+            return web.json_response({"status": "failed", "retcode": 1404, "message": f"未知接口 {action}"}, status=404)
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"status": "failed", "retcode": 1200, "message": "stub error"}, status=500)
+        return web.json_response({"status": "ok", "retcode": 0, "data": self.payload(action, data)})
+
+    def payload(self, action: str, data: dict):
+        group_id = int(data.get("group_id") or 0)
+        if action == "get_group_member_list":
+            return self.member_list
+        if action == "get_group_member_info":
+            user_id = int(data.get("user_id") or 0)
+            return {"group_id": group_id, "user_id": user_id, "nickname": f"user{user_id}", "role": "member", "level": "1"}
+        if action == "get_group_shut_list":
+            return self.shut_list
+        if action == "get_group_info":
+            return {"group_id": group_id, "group_name": f"group{group_id}", "member_count": len(self.member_list), "max_member_count": 3000}
+        if action == "get_group_honor_info":
+            top = {"user_id": 10000, "nickname": "member0"}
+            return {"talkative_list": [top], "performer_list": [top], "legend_list": [], "strong_newbie_list": [], "emotion_list": []}
+        if action == "get_essence_msg_list":
+            return [{"message_id": i, "sender_id": 10000 + i, "nickname": f"member{i}", "description": "stub"} for i in range(20)]
+        if action == "get_group_at_all_remain":
+            return {"remain": 10}
+        if action == "get_group_list":
+            return [{"group_id": 100000 + i, "group_name": f"group{i}", "member_count": len(self.member_list)} for i in range(20)]
+        if action == "get_login_info":
+            return {"user_id": 1, "nickname": "stub"}
+        if action == "get_stranger_info":
+            user_id = int(data.get("user_id") or 0)
+            return {"user_id": user_id, "nickname": f"user{user_id}", "level": 20, "qqLevel": 20, "reg_time": int(time.time()) - 86400 * 1000}
+        if action == "get_msg":
+            return {"message_id": data.get("message_id"), "message": [{"type": "image", "data": {"url": "http://127.0.0.1/stub.png"}}]}
+        if action == "ocr_image":
+            return {"texts": [{"text": "stub"}], "text": "stub"}
+        self._message_id += 1
+        return {"message_id": self._message_id}
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "connections": len(self._connections),
+            "requests": sum(self.requests.values()),
+            "errors": self.errors,
+            "endpoints": self.requests
+        })
+
+
+def build_app(stub: StubNapCat) -> web.Application:
+    app = web.Application()
+    app.router.add_get("/_stats", stub.stats)
+    app.router.add_route("*", "/{action}", stub.handle)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NapCat 替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3900)
+    parser.add_argument("--latency", type=float, default=5, help="平均响应延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0, help="延迟标准差（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0, help="返回 500 的概率")
+    parser.add_argument("--members", type=int, default=3000, help="成员列表规模")
+    parser.add_argument("--muted", type=int, default=50, help="禁言列表规模")
+    args = parser.parse_args()
+    stub = StubNapCat(args.latency, args.jitter, args.error_rate, args.members, args.muted)
+    web.run_app(build_app(stub), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
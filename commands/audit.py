@@ -0,0 +1,37 @@
+import time
+from pkg.platform.types import At
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+MAX_RECORDS = 50
+
+
+@registry.command("audit", "[QQ号|@成员] [条数]", "查看本群管理操作记录，可按目标成员过滤")
+async def audit(ctx: CommandContext):
+    audit_log = ctx.plugin.audit
+    if audit_log is None:
+        await ctx.reply("审计日志未启用")
+        return
+    target = next((str(c.target) for c in ctx.event.message_chain if isinstance(c, At)), None)
+    limit = 10
+    for arg in ctx.args:
+        if not arg.isdigit():
+            continue
+        # 较小的数字视为条数，否则视为 QQ 号
+        if int(arg) <= MAX_RECORDS:
+            limit = int(arg)
+        else:
+            target = arg
+    records = await audit_log.query(ctx.group_id, target, limit)
+    if not records:
+        await ctx.reply("暂无操作记录")
+        return
+    lines = [f"最近 {len(records)} 条操作记录" + (f"（目标 {target}）" if target else "") + ":"]
+    for r in records:
+        line = f"{time.strftime('%m-%d %H:%M', time.localtime(r.ts))} {r.operator} {r.command}"
+        if r.target:
+            line += f" -> {r.target}"
+        if r.args:
+            line += f" [{r.args}]"
+        line += f" {r.result} ({r.latency * 1000:.0f}ms)"
+        lines.append(line)
+    await ctx.reply("\n".join(lines))
@@ -0,0 +1,104 @@
+import time
+from plugins.GroupManagerPlugin.core.broadcast import TEXT, NOTICE
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+KIND_NAMES = {TEXT: "消息", NOTICE: "公告"}
+USAGE = (
+    "使用方法:\n"
+    "/group broadcast <群集合> <text|notice> <内容>\n"
+    "/group broadcast list\n"
+    "/group broadcast status <编号>\n"
+    "/group broadcast resume <编号>"
+)
+
+
+def summarize(broadcast) -> str:
+    failed = broadcast.failed
+    line = (
+        f"广播 #{broadcast.id}（{broadcast.set_name}，{KIND_NAMES[broadcast.kind]}）: "
+        f"成功 {len(broadcast.succeeded)}/{len(broadcast.results)}，失败 {len(failed)}"
+    )
+    pending = len(broadcast.remaining) - len(failed)
+    if pending:
+        line += f"，未发送 {pending}"
+    if failed:
+        line += "\n失败: " + ", ".join(f"{g}({error})" for g, error in failed[:20])
+        if len(failed) > 20:
+            line += f" 等 {len(failed)} 个"
+    if broadcast.remaining:
+        line += f"\n续发未成功的群: /group broadcast resume {broadcast.id}"
+    return line
+
+
+def start(ctx: CommandContext, broadcast):
+    """在独立任务中发送广播，定期向发起的群回报进度，结束后回报结果"""
+    async def progress(b, done, total):
+        await ctx.plugin.notify(b.origin, f"广播 #{b.id} 进度: {done}/{total}")
+
+    async def finished(b, error):
+        text = summarize(b)
+        if error is not None:
+            text = f"广播 #{b.id} 中断: {error}\n{text}"
+        await ctx.plugin.notify(b.origin, text)
+
+    ctx.plugin.broadcasts.launch(broadcast, progress, ctx.plugin.config["broadcast"]["progress_interval"], finished)
+
+
+@registry.command("broadcast", "<群集合> <text|notice> <内容> | list | status|resume <编号>",
+                  "向多个群广播消息或公告（仅全局管理员）", min_args=1, audit=True)
+async def broadcast(ctx: CommandContext):
+    if ctx.sender_id not in ctx.plugin.permissions.admins:
+        await ctx.reply("仅全局管理员可使用广播")
+        return
+    manager = ctx.plugin.broadcasts
+    sub = ctx.args[0]
+
+    if sub.lower() == "list":
+        ctx.audit = False
+        sets = ", ".join(f"{name}({len(groups)})" for name, groups in manager.group_sets.items()) or "无"
+        lines = [f"群集合: all, {sets}"]
+        for b in manager.recent()[:10]:
+            state = "发送中" if manager.is_running(b.id) else f"成功 {len(b.succeeded)}/{len(b.results)}"
+            lines.append(f"#{b.id} {time.strftime('%m-%d %H:%M', time.localtime(b.created))} {b.set_name} "
+                         f"{KIND_NAMES[b.kind]} {state}: {b.content[:20]}")
+        await ctx.reply("\n".join(lines))
+        return
+
+    if sub.lower() in ("status", "resume"):
+        ctx.audit = sub.lower() == "resume"
+        if len(ctx.args) < 2 or not ctx.args[1].lstrip("#").isdigit():
+            await ctx.reply(USAGE)
+            return
+        b = manager.get(int(ctx.args[1].lstrip("#")))
+        if b is None:
+            await ctx.reply(f"没有广播 #{ctx.args[1].lstrip('#')}")
+            return
+        if sub.lower() == "status":
+            state = "（发送中）" if manager.is_running(b.id) else ""
+            await ctx.reply(summarize(b) + state)
+            return
+        if not b.remaining:
+            await ctx.reply(f"广播 #{b.id} 已全部发送成功")
+            return
+        if manager.is_running(b.id):
+            await ctx.reply(f"广播 #{b.id} 正在发送中")
+            return
+        start(ctx, b)
+        ctx.result = f"续发 #{b.id}，{len(b.remaining)} 个群"
+        await ctx.reply(f"开始续发广播 #{b.id} 到 {len(b.remaining)} 个群")
+        return
+
+    if len(ctx.args) < 3 or ctx.args[1].lower() not in KIND_NAMES:
+        await ctx.reply(USAGE)
+        return
+    kind = ctx.args[1].lower()
+    content = " ".join(ctx.args[2:])
+    all_groups = set().union(*(b.groups for b in ctx.plugin.backends.backends))
+    groups = manager.resolve_set(sub, all_groups)
+    if not groups:
+        await ctx.reply(f"群集合 {sub} 中没有群")
+        return
+    b = manager.create(sub, kind, content, ctx.sender_id, ctx.group_id, groups)
+    start(ctx, b)
+    ctx.result = f"广播 #{b.id}，{len(groups)} 个群"
+    await ctx.reply(f"开始向 {len(groups)} 个群广播{KIND_NAMES[kind]}（#{b.id}）")
@@ -0,0 +1,10 @@
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+
+@registry.command("reload", description="立即重新加载 settings.yaml", audit=True)
+async def reload(ctx: CommandContext):
+    settings = ctx.plugin.settings
+    if await settings.reload():
+        await ctx.reply("配置已重新加载")
+    else:
+        await ctx.reply(f"配置加载失败，继续使用上一次的有效配置: {settings.last_error}")
@@ -0,0 +1,22 @@
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+
+@registry.command("movefile", "<文件ID> <目标目录>", "移动群文件", min_args=2, audit=True)
+async def movefile(ctx: CommandContext):
+    file_id = ctx.args[0]
+    target_dir = ctx.args[1]
+    await ctx.group_api.move_group_file(ctx.group_id, file_id, target_dir)
+    await ctx.reply("群文件已移动")
+
+
+@registry.command("uploadfile", "<文件URL>", "上传群文件（后台执行）", min_args=1, audit=True)
+async def uploadfile(ctx: CommandContext):
+    file_url = ctx.args[0]
+
+    async def run():
+        await ctx.group_api.upload_group_file(ctx.group_id, file_url)
+        return "群文件已上传"
+
+    job = ctx.plugin.jobs.submit("uploadfile", ctx.group_id, file_url, run)
+    ctx.result = f"已受理，任务 #{job.id}"
+    await ctx.reply(f"已受理，任务 #{job.id}")
@@ -0,0 +1,41 @@
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+from plugins.GroupManagerPlugin.core.keyword_filter import GLOBAL_SCOPE
+
+
+@registry.command("filter", "<add|del|list> [global] [违禁词...]", "管理违禁词，global 表示所有群生效（仅全局管理员）",
+                  min_args=1, audit=True)
+async def filter_words(ctx: CommandContext):
+    keyword_filter = ctx.plugin.keyword_filter
+    if keyword_filter is None:
+        await ctx.reply("违禁词过滤未启用")
+        return
+    sub = ctx.args[0].lower()
+    words = ctx.args[1:]
+    scope = ctx.group_id
+    if words and words[0].lower() == "global":
+        if ctx.sender_id not in ctx.plugin.permissions.admins:
+            await ctx.reply("仅全局管理员可修改全局违禁词")
+            return
+        scope = GLOBAL_SCOPE
+        words = words[1:]
+    scope_name = "全局" if scope == GLOBAL_SCOPE else "本群"
+
+    if sub == "list":
+        ctx.audit = False
+        patterns = keyword_filter.patterns(scope)
+        if not patterns:
+            await ctx.reply(f"{scope_name}暂无违禁词")
+            return
+        shown = "、".join(patterns[:200])
+        more = f" 等 {len(patterns)} 个" if len(patterns) > 200 else ""
+        await ctx.reply(f"{scope_name}违禁词: {shown}{more}")
+        return
+    if sub not in ("add", "del") or not words:
+        await ctx.reply("使用方法: /group filter <add|del|list> [global] [违禁词...]")
+        return
+    if sub == "add":
+        changed = keyword_filter.add(words, scope)
+        await ctx.reply(f"已添加{scope_name}违禁词 {len(changed)} 个" if changed else "违禁词均已存在")
+    else:
+        changed = keyword_filter.remove(words, scope)
+        await ctx.reply(f"已删除{scope_name}违禁词 {len(changed)} 个" if changed else "未找到这些违禁词")
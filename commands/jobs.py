@@ -0,0 +1,21 @@
+import time
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+STATUS_NAMES = {"queued": "排队中", "running": "执行中", "done": "已完成", "failed": "失败"}
+
+
+@registry.command("jobs", description="查看本群后台任务（排队/执行中/失败）")
+async def jobs(ctx: CommandContext):
+    job_list = ctx.plugin.jobs.jobs(ctx.group_id)
+    stats = ctx.plugin.jobs.stats()
+    lines = [f"后台任务: 排队 {stats['queued']}/{stats['max_queue']}, 执行中 {stats['running']}/{stats['workers']}"]
+    for job in job_list[:20]:
+        line = f"#{job.id} {job.name} {STATUS_NAMES[job.status]} - {job.description}"
+        if job.status == "running":
+            line += f" (已运行 {time.time() - job.started:.0f} 秒)"
+        elif job.status == "failed":
+            line += f" ({job.error})"
+        lines.append(line)
+    if not job_list:
+        lines.append("本群暂无后台任务")
+    await ctx.reply("\n".join(lines))
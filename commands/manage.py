@@ -0,0 +1,108 @@
+from plugins.GroupManagerPlugin.core.batch import parse_targets, run_batch, format_batch_result, describe_failures
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+
+@registry.command("mute", "<QQ号[,QQ号...]|@成员...> <分钟>", "禁言成员，支持批量", min_args=2, audit=True)
+async def mute(ctx: CommandContext):
+    minutes = ctx.args[-1]
+    duration = int(minutes) * 60  # 转换为秒
+    targets = ctx.targets = parse_targets(ctx.args[:-1], ctx.event.message_chain)
+    if len(targets) == 1:
+        await ctx.group_api.mute_group_member(ctx.group_id, targets[0], duration)
+        await ctx.reply(f"已禁言 {targets[0]} {minutes}分钟")
+        return
+    succeeded, failed = await run_batch(
+        targets,
+        lambda qq: ctx.group_api.mute_group_member(ctx.group_id, qq, duration),
+        ctx.plugin.config["batch"]["concurrency"]
+    )
+    ctx.result = describe_failures(failed)
+    await ctx.reply(format_batch_result(f"禁言 {minutes}分钟", succeeded, failed))
+
+
+@registry.command("unmute", "<QQ号[,QQ号...]|@成员...|all>", "解除禁言，all 解除全部禁言", min_args=1, audit=True)
+async def unmute(ctx: CommandContext):
+    if ctx.args[0].lower() == "all":
+        # 禁言列表可能已被缓存，批量解禁前重新拉取
+        ctx.group_api.invalidate("get_group_shut_list", ctx.group_id)
+        mute_list = await ctx.group_api.get_group_shut_list(ctx.group_id)
+        targets = [str(m['user_id']) for m in mute_list.get('data') or [] if m.get('shut_up_timestamp', 0) > 0]
+        if not targets:
+            await ctx.reply("无禁言成员")
+            return
+        ctx.targets = targets
+    else:
+        targets = ctx.targets = parse_targets(ctx.args, ctx.event.message_chain)
+        if len(targets) == 1:
+            await ctx.group_api.mute_group_member(ctx.group_id, targets[0], 0)
+            await ctx.reply(f"已解除 {targets[0]} 的禁言")
+            return
+    succeeded, failed = await run_batch(
+        targets,
+        lambda qq: ctx.group_api.mute_group_member(ctx.group_id, qq, 0),
+        ctx.plugin.config["batch"]["concurrency"]
+    )
+    ctx.result = describe_failures(failed)
+    await ctx.reply(format_batch_result("解除禁言", succeeded, failed))
+
+
+@registry.command("announce", "<内容>", "发布公告", min_args=1, audit=True)
+async def announce(ctx: CommandContext):
+    content = " ".join(ctx.args)
+    await ctx.group_api.send_group_notice(ctx.group_id, content)
+    await ctx.reply("公告已发布")
+
+
+@registry.command("essence", "<消息ID>", "设置精华消息", min_args=1, audit=True)
+async def essence(ctx: CommandContext):
+    message_id = ctx.args[0]
+    await ctx.group_api.set_essence_message(ctx.group_id, message_id)
+    await ctx.reply("已设置群精华消息")
+
+
+@registry.command("kick", "<QQ号[,QQ号...]|@成员...>", "踢出成员，支持批量", min_args=1, audit=True)
+async def kick(ctx: CommandContext):
+    targets = ctx.targets = parse_targets(ctx.args, ctx.event.message_chain)
+
+    async def kick_one(target_qq):
+        await ctx.group_api.kick_group_member(ctx.group_id, target_qq)
+        roster = ctx.plugin.roster.peek(ctx.group_id)
+        if roster is not None:
+            roster.remove(target_qq)
+
+    if len(targets) == 1:
+        await kick_one(targets[0])
+        await ctx.reply(f"已踢出 {targets[0]}")
+        return
+    succeeded, failed = await run_batch(targets, kick_one, ctx.plugin.config["batch"]["concurrency"])
+    ctx.result = describe_failures(failed)
+    await ctx.reply(format_batch_result("踢出", succeeded, failed))
+
+
+@registry.command("setadmin", "<QQ号> <true|false>", "设置/取消管理员", min_args=2, audit=True)
+async def setadmin(ctx: CommandContext):
+    target_qq = ctx.args[0]
+    ctx.targets = [target_qq]
+    enable = ctx.args[1].lower() == "true"
+    await ctx.group_api.set_group_admin(ctx.group_id, target_qq, enable)
+    roster = ctx.plugin.roster.peek(ctx.group_id)
+    if roster is not None:
+        roster.set_role(target_qq, "admin" if enable else "member")
+    action = "设置" if enable else "取消"
+    await ctx.reply(f"已{action} {target_qq} 的管理员权限")
+
+
+@registry.command("setname", "<新群名>", "修改群名", min_args=1, audit=True)
+async def setname(ctx: CommandContext):
+    new_name = " ".join(ctx.args)
+    await ctx.group_api.set_group_name(ctx.group_id, new_name)
+    await ctx.reply(f"群名已修改为 {new_name}")
+
+
+@registry.command("settitle", "<QQ号> <头衔>", "设置成员头衔", min_args=2, audit=True)
+async def settitle(ctx: CommandContext):
+    target_qq = ctx.args[0]
+    ctx.targets = [target_qq]
+    title = " ".join(ctx.args[1:])
+    await ctx.group_api.set_group_special_title(ctx.group_id, target_qq, title)
+    await ctx.reply(f"已为 {target_qq} 设置头衔: {title}")
@@ -0,0 +1,155 @@
+from pkg.platform.types import MessageChain, AtAll, Plain, Image, Quote
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+
+@registry.command("atall", "<消息>", "@全体成员", min_args=1)
+async def atall(ctx: CommandContext):
+    await ctx.reply(MessageChain([
+        AtAll(),
+        Plain(" ".join(ctx.args))
+    ]))
+    # @全体会消耗剩余次数
+    ctx.group_api.invalidate("get_group_at_all_remain", ctx.group_id)
+
+
+@registry.command("poke", "<QQ号>", "戳一戳", min_args=1)
+async def poke(ctx: CommandContext):
+    target_qq = ctx.args[0]
+    await ctx.group_api.send_group_poke(ctx.group_id, target_qq)
+    await ctx.reply(f"已戳一戳 {target_qq}")
+
+
+@registry.command("like", "<QQ号> <次数>", "点赞", min_args=2)
+async def like(ctx: CommandContext):
+    target_qq = ctx.args[0]
+    times = int(ctx.args[1])
+    await ctx.group_api.send_like(target_qq, times)
+    await ctx.reply(f"已为 {target_qq} 点赞 {times} 次")
+
+
+@registry.command("sendimg", "<图片URL>", "发送图片", min_args=1)
+async def sendimg(ctx: CommandContext):
+    image_url = ctx.args[0]
+    await ctx.message_api.send_group_image(ctx.group_id, image_url)
+    await ctx.reply("图片已发送")
+
+
+@registry.command("sendvoice", "<语音URL>", "发送语音", min_args=1)
+async def sendvoice(ctx: CommandContext):
+    voice_url = ctx.args[0]
+    await ctx.message_api.send_group_voice(ctx.group_id, voice_url)
+    await ctx.reply("语音已发送")
+
+
+@registry.command("sendface", "<表情ID>", "发送系统表情", min_args=1)
+async def sendface(ctx: CommandContext):
+    face_id = ctx.args[0]
+    await ctx.message_api.send_group_msg(ctx.group_id, face_id)
+    await ctx.reply("系统表情已发送")
+
+
+@registry.command("sendjson", "<JSON内容>", "发送JSON消息", min_args=1)
+async def sendjson(ctx: CommandContext):
+    json_content = " ".join(ctx.args)
+    await ctx.message_api.send_group_json(ctx.group_id, json_content)
+    await ctx.reply("JSON消息已发送")
+
+
+@registry.command("reply", "<消息ID> <内容>", "回复消息", min_args=2)
+async def reply(ctx: CommandContext):
+    message_id = ctx.args[0]
+    content = " ".join(ctx.args[1:])
+    await ctx.message_api.send_group_reply(ctx.group_id, message_id, content)
+    await ctx.reply("回复消息已发送")
+
+
+@registry.command("recall", "<消息ID>", "撤回消息", min_args=1, audit=True)
+async def recall(ctx: CommandContext):
+    message_id = ctx.args[0]
+    await ctx.message_api.recall_group_message(ctx.group_id, message_id)
+    await ctx.reply("消息已撤回")
+
+
+async def collect_images(ctx: CommandContext) -> list:
+    """收集命令参数中的 URL、命令消息中的图片以及所回复消息中的图片，去重并保持顺序"""
+    # 消息中的图片在命令文本里显示为占位符，参数只保留 URL
+    urls = [arg for arg in ctx.args if "://" in arg]
+    quotes = []
+    for component in ctx.event.message_chain:
+        if isinstance(component, Image) and component.url:
+            urls.append(component.url)
+        elif isinstance(component, Quote):
+            quotes.append(component)
+    for quote in quotes:
+        images = [c.url for c in quote.origin or [] if isinstance(c, Image) and c.url]
+        if not images:
+            # 消息链中没有被回复消息的内容时向 NapCat 查询
+            segments = await ctx.message_api.get_msg(ctx.group_id, str(quote.id))
+            images = [
+                s["data"].get("url") or s["data"].get("file")
+                for s in segments if s.get("type") == "image" and s.get("data")
+            ]
+        urls += [url for url in images if url]
+    return list(dict.fromkeys(urls))
+
+
+@registry.command("ocr", "[图片URL ...]", "图片OCR识别，可附带图片或回复图片消息（后台执行）")
+async def ocr(ctx: CommandContext):
+    image_urls = await collect_images(ctx)
+    if not image_urls:
+        await ctx.reply("使用方法: /group ocr <图片URL ...>，或附带图片/回复包含图片的消息")
+        return
+    max_images = ctx.plugin.config["ocr"]["max_images"]
+    if len(image_urls) > max_images:
+        await ctx.reply(f"一次最多识别 {max_images} 张图片")
+        return
+
+    async def run():
+        results = await ctx.plugin.ocr.recognize_many(image_urls)
+        if len(results) == 1:
+            text, error = results[0]
+            if error is not None:
+                raise Exception(error)
+            return f"OCR识别结果:\n{text}"
+        # 多张图片的结果合并为一条转发消息，每张图一个节点
+        nodes = [f"OCR识别结果（{len(results)} 张图片）"]
+        nodes += [
+            f"图片 {index}:\n{text}" if error is None else f"图片 {index}: 识别失败，{error}"
+            for index, (text, error) in enumerate(results, 1)
+        ]
+        await ctx.message_api.send_group_forward_message(ctx.group_id, nodes, ctx.sender_id)
+        failed = sum(1 for _, error in results if error is not None)
+        return f"OCR识别完成，{len(results) - failed} 张成功" + (f"，{failed} 张失败" if failed else "")
+
+    job = ctx.plugin.jobs.submit("ocr", ctx.group_id, f"{len(image_urls)} 张图片", run)
+    await ctx.reply(f"已受理，任务 #{job.id}")
+
+
+@registry.command("typing", description="设置输入状态")
+async def typing(ctx: CommandContext):
+    await ctx.group_api.set_typing_status(ctx.group_id)
+    await ctx.reply("已设置输入状态")
+
+
+@registry.command("sendtext", "<内容>", "发送纯文本消息", min_args=1)
+async def sendtext(ctx: CommandContext):
+    content = " ".join(ctx.args)
+    await ctx.message_api.send_group_text(ctx.group_id, content)
+    await ctx.reply("文本消息已发送")
+
+
+@registry.command("forward", "<消息1> | <消息2> | ...", "发送合并转发消息（后台执行）", min_args=1)
+async def forward(ctx: CommandContext):
+    # 将命令参数按 | 分割为多条消息
+    messages = " ".join(ctx.args).split("|")
+    messages = [msg.strip() for msg in messages if msg.strip()]  # 去除空消息
+    if not messages:
+        await ctx.reply("请提供至少一条消息")
+        return
+
+    async def run():
+        await ctx.message_api.send_group_forward_message(ctx.group_id, messages, ctx.sender_id)
+        return "合并转发消息已发送"
+
+    job = ctx.plugin.jobs.submit("forward", ctx.group_id, f"{len(messages)} 条消息", run)
+    await ctx.reply(f"已受理，任务 #{job.id}")
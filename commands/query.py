@@ -0,0 +1,205 @@
+import time
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+from plugins.GroupManagerPlugin.core.paging import split_page_args, reply_list
+
+
+@registry.command("essencelist", "[页码|all]", "查看群精华消息列表")
+async def essencelist(ctx: CommandContext):
+    _, page, dump = split_page_args(ctx.args)
+    essence_list = await ctx.group_api.get_essence_msg_list(ctx.group_id)
+    if not essence_list.get('data'):
+        await ctx.reply("当前群无精华消息")
+        return
+    await reply_list(
+        ctx, "/group essencelist", f"群精华消息列表（共 {len(essence_list['data'])} 条）", essence_list['data'],
+        lambda m: f"消息ID: {m['message_id']}, 发送者: {m['sender_id']} ({m['nickname']}), 时间: {m['description']}",
+        page, dump
+    )
+
+
+@registry.command("honor", description="查看群荣誉信息")
+async def honor(ctx: CommandContext):
+    honor_info = await ctx.group_api.get_group_honor_info(ctx.group_id)
+    honor_data = honor_info.get('data', {})
+    honor_msg = []
+    if honor_data.get('talkative_list'):
+        talkative = honor_data['talkative_list'][0]
+        honor_msg.append(f"龙王: {talkative['user_id']} ({talkative['nickname']})")
+    if honor_data.get('performer_list'):
+        performer = honor_data['performer_list'][0]
+        honor_msg.append(f"群聊之火: {performer['user_id']} ({performer['nickname']})")
+    if honor_data.get('legend_list'):
+        legend = honor_data['legend_list'][0]
+        honor_msg.append(f"群聊炽焰: {legend['user_id']} ({legend['nickname']})")
+    if honor_data.get('strong_newbie_list'):
+        newbie = honor_data['strong_newbie_list'][0]
+        honor_msg.append(f"冒尖小春笋: {newbie['user_id']} ({newbie['nickname']})")
+    if honor_data.get('emotion_list'):
+        emotion = honor_data['emotion_list'][0]
+        honor_msg.append(f"快乐源泉: {emotion['user_id']} ({emotion['nickname']})")
+    honor_str = "\n".join(honor_msg) if honor_msg else "暂无群荣誉信息"
+    await ctx.reply(f"群荣誉信息:\n{honor_str}")
+
+
+@registry.command("info", description="查看群信息")
+async def info(ctx: CommandContext):
+    group_info = await ctx.group_api.get_group_info(ctx.group_id)
+    info_msg = (
+        f"群ID: {group_info['group_id']}\n"
+        f"群名: {group_info['group_name']}\n"
+        f"成员数: {group_info['member_count']}\n"
+        f"最大成员数: {group_info['max_member_count']}"
+    )
+    await ctx.reply(info_msg)
+
+
+MEMBERS_USAGE = {
+    "search": "/group members search <关键词>",
+    "inactive": "/group members inactive <天数>",
+    "role": "/group members role <owner|admin|member>"
+}
+
+
+@registry.command("members", "[search <关键词>|inactive <天数>|role <角色>|reload] [页码|all]",
+                  "查看/搜索/筛选群成员，reload 重新加载成员列表，all 以合并转发发送全部")
+async def members(ctx: CommandContext):
+    sub = ctx.args[0].lower() if ctx.args else ""
+    args, page, dump = split_page_args(ctx.args, 2 if sub in MEMBERS_USAGE else 0)
+    sub = args[0].lower() if args else ""
+    if sub in MEMBERS_USAGE and len(args) < 2:
+        await ctx.reply(f"使用方法: {MEMBERS_USAGE[sub]}")
+        return
+    if sub == "reload":
+        ctx.plugin.roster.forget(ctx.group_id)
+        ctx.group_api.invalidate("get_group_member_list", ctx.group_id)
+    roster = await ctx.plugin.roster.get(ctx.group_id)
+    if sub == "search":
+        found = roster.search(" ".join(args[1:]))
+        title = f"搜索到 {len(found)} 个成员"
+    elif sub == "inactive":
+        days = int(args[1])
+        found = roster.filter(inactive_since=int(time.time()) - days * 86400)
+        found.sort(key=lambda m: m.last_sent_time)
+        title = f"{days} 天内未发言的成员共 {len(found)} 个"
+    elif sub == "role":
+        role = args[1].lower()
+        found = roster.filter(role=role)
+        title = f"角色为 {role} 的成员共 {len(found)} 个"
+    elif sub == "reload":
+        await ctx.reply(f"已重新加载成员列表，共 {len(roster)} 个成员")
+        return
+    else:
+        found = list(roster)
+        title = f"群成员共 {len(roster)} 个"
+    command = " ".join(["/group members", *args])
+    await reply_list(ctx, command, title, found, lambda m: f"{m.user_id} ({m.nickname})", page, dump)
+
+
+@registry.command("atallcount", description="查看@全体剩余次数")
+async def atallcount(ctx: CommandContext):
+    at_all_info = await ctx.group_api.get_group_at_all_remain(ctx.group_id)
+    remain = at_all_info.get('data', {}).get('remain', 0)
+    await ctx.reply(f"群@全体剩余次数: {remain}")
+
+
+@registry.command("mutelist", "[页码|all]", "查看禁言列表")
+async def mutelist(ctx: CommandContext):
+    _, page, dump = split_page_args(ctx.args)
+    mute_list = await ctx.group_api.get_group_shut_list(ctx.group_id)
+    muted = [m for m in mute_list['data'] if m['shut_up_timestamp'] > 0]
+    if not muted:
+        await ctx.reply("群禁言列表:\n无禁言成员")
+        return
+    await reply_list(
+        ctx, "/group mutelist", f"群禁言列表（共 {len(muted)} 个）", muted,
+        lambda m: f"{m['user_id']} ({m['nickname']})", page, dump
+    )
+
+
+@registry.command("cache", "[clear]", "查看缓存命中统计/清空缓存")
+async def cache(ctx: CommandContext):
+    cache = ctx.plugin.cache
+    if cache is None:
+        await ctx.reply("缓存未启用")
+        return
+    if ctx.args and ctx.args[0].lower() == "clear":
+        cache.clear()
+        ctx.plugin.roster.clear()
+        await ctx.reply("缓存已清空")
+        return
+    stats = cache.stats()
+    lines = [
+        f"缓存条目: {stats['size']}/{stats['maxsize']}, 命中: {stats['hits']}, 未命中: {stats['misses']}",
+        f"合并的并发读请求: {ctx.group_api.singleflight.shared}"
+    ]
+    lines += [f"{name}: 命中 {c['hits']} / 未命中 {c['misses']}" for name, c in stats['endpoints'].items()]
+    if ctx.plugin.media is not None:
+        media = ctx.plugin.media.stats()
+        lines.append(
+            f"媒体缓存: {media['files']} 个文件, {media['bytes'] // 1024}/{media['max_bytes'] // 1024} KB, "
+            f"命中 {media['hits']}, 下载 {media['downloads']}"
+        )
+    await ctx.reply("\n".join(lines))
+
+
+@registry.command("warmup", "[run]", "查看启动预热进度/重新预热")
+async def warmup(ctx: CommandContext):
+    warmup = ctx.plugin.warmup
+    if warmup is None:
+        await ctx.reply("启动预热未启用")
+        return
+    if ctx.args and ctx.args[0].lower() == "run":
+        if warmup.state == "running":
+            await ctx.reply("预热正在进行中")
+            return
+        ctx.plugin.spawn(warmup.run())
+        await ctx.reply("已开始重新预热")
+        return
+    stats = warmup.stats()
+    states = {"pending": "未开始", "running": "进行中", "done": "已完成"}
+    lines = [
+        f"预热状态: {states.get(stats['state'], stats['state'])}",
+        f"进度: {stats['done']}/{stats['total']} 个群，失败 {stats['failed']}，耗时 {stats['elapsed']:.1f} 秒",
+        f"记录活跃时间的群: {stats['tracked']}"
+    ]
+    lines += [f"{group_id}: {error}" for group_id, error in warmup.failed[:5]]
+    await ctx.reply("\n".join(lines))
+
+
+@registry.command("outbox", description="查看消息发送队列与限速统计")
+async def outbox(ctx: CommandContext):
+    scheduler = ctx.plugin.outbox
+    if scheduler is None:
+        await ctx.reply("发送调度未启用")
+        return
+    stats = scheduler.stats()
+    lines = [
+        f"队列深度: {stats['depth']}",
+        f"已发送: {stats['sent']}, 合并: {stats['merged']}, 失败: {stats['failed']}, 丢弃: {stats['rejected']}",
+        f"群限速等待: {stats['group_throttled']} 次, 全局限速等待: {stats['global_throttled']} 次"
+    ]
+    lines += [f"群 {group_id}: 排队 {depth} 条" for group_id, depth in stats['groups'].items()]
+    await ctx.reply("\n".join(lines))
+
+
+BREAKER_NAMES = {"closed": "正常", "open": "熔断中", "half_open": "探测恢复中", None: "未启用熔断"}
+
+
+@registry.command("health", description="查看各 NapCat 后端的健康与熔断状态")
+async def health(ctx: CommandContext):
+    pool = ctx.plugin.backends
+    lines = []
+    for backend, stats in zip(pool.backends, pool.stats()):
+        line = (
+            f"{stats['name']}（账号 {stats['self_id'] or '未知'}）: "
+            f"{'在线' if stats['healthy'] else '离线'}, {BREAKER_NAMES[stats['breaker']]}, "
+            f"进行中 {stats['inflight']}, 所在群 {stats['groups']} 个"
+        )
+        if stats['breaker'] == "open":
+            line += f", 约 {backend.breaker.retry_after():.0f} 秒后尝试恢复"
+        lines.append(line)
+        if stats['last_error']:
+            lines.append(f"  最近错误: {stats['last_error']}")
+    for name, error in ctx.plugin.startup_errors.items():
+        lines.append(f"组件 {name} 启动失败: {error}")
+    await ctx.reply("\n".join(lines))
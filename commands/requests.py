@@ -0,0 +1,45 @@
+import time
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+
+@registry.command("requests", "[approve|reject <编号...|all> [理由]]", "查看/处理待人工审核的加群请求", audit=True)
+async def requests(ctx: CommandContext):
+    engine = ctx.plugin.join_requests
+    if engine is None:
+        await ctx.reply("加群请求自动处理未启用")
+        return
+    pending = engine.pending(ctx.group_id)
+    if not ctx.args:
+        ctx.audit = False
+        if not pending:
+            await ctx.reply("暂无待审核的加群请求")
+            return
+        lines = [f"待审核的加群请求 {len(pending)} 个:"]
+        for r in pending[:30]:
+            line = f"#{r.id} {r.user_id} {time.strftime('%m-%d %H:%M', time.localtime(r.time))}"
+            if r.comment:
+                line += f" 验证: {r.comment[:40]}"
+            lines.append(line + f"（{r.reason}）")
+        lines.append("处理: /group requests approve|reject <编号...|all>")
+        await ctx.reply("\n".join(lines))
+        return
+
+    sub = ctx.args[0].lower()
+    if sub not in ("approve", "reject") or len(ctx.args) < 2:
+        await ctx.reply("使用方法: /group requests [approve|reject <编号...|all> [理由]]")
+        return
+    if ctx.args[1].lower() == "all":
+        request_ids = [r.id for r in pending]
+        reason = " ".join(ctx.args[2:])
+    else:
+        ids = [a.lstrip("#") for a in ctx.args[1:]]
+        request_ids = [int(i) for i in ids if i.isdigit()]
+        reason = " ".join(i for i in ids if not i.isdigit())
+    succeeded, failed = await engine.resolve(ctx.group_id, request_ids, sub == "approve", reason)
+    ctx.targets = [str(r.user_id) for r in succeeded]
+    action = "通过" if sub == "approve" else "拒绝"
+    lines = [f"已{action} {len(succeeded)} 个加群请求"]
+    if failed:
+        ctx.result = "部分失败: " + ", ".join(f"{r.user_id}({error})" for r, error in failed)
+        lines.append("失败: " + ", ".join(f"#{r.id}({error})" for r, error in failed))
+    await ctx.reply("\n".join(lines))
@@ -0,0 +1,92 @@
+import time
+from plugins.GroupManagerPlugin.core.batch import parse_targets
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+from plugins.GroupManagerPlugin.core.scheduler import parse_duration, parse_time
+
+ACTION_NAMES = {"announce": "公告", "remind": "提醒", "unmute": "解除禁言", "kick": "踢出"}
+USAGE = (
+    "使用方法:\n"
+    "/group schedule announce <时间> <内容>\n"
+    "/group schedule remind <时间> [every <间隔>] <内容>\n"
+    "/group schedule unmute <时间> <QQ号|@成员>\n"
+    "/group schedule kick <时间> <QQ号|@成员> [警告内容]\n"
+    "/group schedule list\n"
+    "/group schedule cancel <任务ID>\n"
+    "时间可以是 10m、2h、21:30 或 2025-01-01T08:00"
+)
+
+
+def format_due(due: float) -> str:
+    return time.strftime("%m-%d %H:%M", time.localtime(due))
+
+
+@registry.command("schedule", "<announce|remind|unmute|kick|list|cancel> [参数]", "定时公告、提醒、解禁与踢人",
+                  min_args=1, audit=True)
+async def schedule(ctx: CommandContext):
+    scheduler = ctx.plugin.scheduler
+    if scheduler is None:
+        await ctx.reply("定时任务未启用")
+        return
+    sub = ctx.args[0].lower()
+    args = ctx.args[1:]
+
+    if sub == "list":
+        ctx.audit = False
+        jobs = scheduler.jobs(ctx.group_id)
+        if not jobs:
+            await ctx.reply("本群暂无定时任务")
+            return
+        lines = [f"本群定时任务 {len(jobs)} 个:"]
+        for job in jobs[:30]:
+            line = f"#{job.id} {format_due(job.due)} {ACTION_NAMES.get(job.action, job.action)}"
+            if job.interval:
+                line += f" 每 {job.interval // 60} 分钟"
+            if "user_id" in job.payload:
+                line += f" {job.payload['user_id']}"
+            if "text" in job.payload:
+                line += f": {job.payload['text'][:30]}"
+            lines.append(line)
+        await ctx.reply("\n".join(lines))
+        return
+
+    if sub == "cancel":
+        if not args or not args[0].lstrip("#").isdigit():
+            await ctx.reply("使用方法: /group schedule cancel <任务ID>")
+            return
+        job_id = int(args[0].lstrip("#"))
+        if scheduler.cancel(job_id, ctx.group_id):
+            await ctx.reply(f"已取消定时任务 #{job_id}")
+        else:
+            await ctx.reply(f"本群没有定时任务 #{job_id}")
+        return
+
+    if sub not in ACTION_NAMES or len(args) < 2:
+        await ctx.reply(USAGE)
+        return
+    due = parse_time(args[0])
+    rest = args[1:]
+    interval = 0
+    payload = {}
+    if sub in ("announce", "remind"):
+        if sub == "remind" and rest[0].lower() == "every" and len(rest) >= 3:
+            interval = parse_duration(rest[1])
+            if interval < 60:
+                raise Exception("周期提醒的间隔不能小于 1 分钟")
+            rest = rest[2:]
+        payload["text"] = " ".join(rest)
+    else:
+        targets = parse_targets(rest[:1], ctx.event.message_chain)
+        if len(targets) != 1 or not targets[0].isdigit():
+            await ctx.reply(f"使用方法: /group schedule {sub} <时间> <QQ号|@成员>")
+            return
+        payload["user_id"] = targets[0]
+        ctx.targets = targets
+    job = scheduler.add(ctx.group_id, sub, due, payload, ctx.sender_id, interval)
+    ctx.result = f"已创建 #{job.id}"
+    if sub == "kick":
+        # 先发出警告，到期后再踢出
+        warning = " ".join(rest[1:]) or "请注意群规"
+        await ctx.reply(f"{payload['user_id']} {warning}，将于 {format_due(due)} 被移出本群（任务 #{job.id}）")
+        return
+    repeat = f"，之后每 {interval // 60} 分钟一次" if interval else ""
+    await ctx.reply(f"已创建定时{ACTION_NAMES[sub]} #{job.id}，将于 {format_due(due)} 执行{repeat}")
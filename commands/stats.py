@@ -0,0 +1,27 @@
+from plugins.GroupManagerPlugin.core.commands import registry, CommandContext
+
+
+def format_series(items: list, limit: int = 15) -> list:
+    """按调用次数排序，输出次数、错误、进行中数量及 p50/p95/p99 延迟（毫秒）"""
+    items = sorted(items, key=lambda item: item[1].total, reverse=True)[:limit]
+    return [
+        f"{name}: {s.total}次 错误{s.errors} 进行中{s.inflight} "
+        f"p50={s.percentile(0.5) * 1000:.0f}ms p95={s.percentile(0.95) * 1000:.0f}ms p99={s.percentile(0.99) * 1000:.0f}ms"
+        for name, s in items
+    ]
+
+
+@registry.command("stats", description="查看接口与命令的调用次数、错误和延迟统计")
+async def stats(ctx: CommandContext):
+    metrics = ctx.plugin.metrics
+    if metrics is None:
+        await ctx.reply("统计未启用")
+        return
+    lines = ["NapCat 接口:"]
+    lines += format_series(metrics.items("napcat")) or ["暂无数据"]
+    lines.append("命令:")
+    lines += format_series(metrics.items("command")) or ["暂无数据"]
+    gauges = ctx.plugin.collect_gauges()
+    if gauges:
+        lines.append("状态: " + ", ".join(f"{name}={value}" for name, value in gauges.items()))
+    await ctx.reply("\n".join(lines))
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS audit (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        group_id TEXT NOT NULL,
+        operator INTEGER NOT NULL,
+        command TEXT NOT NULL,
+        target TEXT NOT NULL DEFAULT '',
+        args TEXT NOT NULL DEFAULT '',
+        result TEXT NOT NULL DEFAULT '',
+        latency REAL NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS audit_group ON audit (group_id, id)",
+    "CREATE INDEX IF NOT EXISTS audit_group_target ON audit (group_id, target, id)",
+    # 只允许追加，拒绝修改和删除已有记录
+    "CREATE TRIGGER IF NOT EXISTS audit_no_update BEFORE UPDATE ON audit BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END",
+    "CREATE TRIGGER IF NOT EXISTS audit_no_delete BEFORE DELETE ON audit BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END",
+)
+
+
+class AuditRecord:
+    """一条审计记录"""
+    __slots__ = ("ts", "group_id", "operator", "command", "target", "args", "result", "latency")
+
+    def __init__(self, ts: float, group_id: str, operator: int, command: str, target: str, args: str, result: str, latency: float):
+        self.ts = ts
+        self.group_id = group_id
+        self.operator = operator
+        self.command = command
+        self.target = target
+        self.args = args
+        self.result = result
+        self.latency = latency
+
+
+class AuditLog:
+    """
+    管理操作的审计日志，存储在 WAL 模式的 SQLite 中，只追加不修改。
+    record 只把记录放入内存缓冲区；后台任务按间隔或缓冲区达到 batch_size 时，
+    在专用线程中批量写入，命令处理路径不会等待磁盘。
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1, batch_size: int = 200, max_buffer: int = 10000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._wake = asyncio.Event()
+        # 单线程执行器：SQLite 连接只在该线程中使用，写入按提交顺序进行
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit")
+        self._conn = None
+        self._task = None
+        self.written = 0
+        self.dropped = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._open)
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=False)
+
+    def record(self, group_id: str, operator: int, command: str, targets: list, args: list, result: str, latency: float):
+        """记录一次操作，每个目标一条；没有目标时记录一条空目标记录"""
+        ts = time.time()
+        args_text = " ".join(args)
+        for target in targets or [""]:
+            self._buffer.append((ts, group_id, operator, command, str(target), args_text, result, latency))
+        if len(self._buffer) > self.max_buffer:
+            # 磁盘长时间不可写时丢弃最旧的记录，避免内存无限增长
+            overflow = len(self._buffer) - self.max_buffer
+            del self._buffer[:overflow]
+            self.dropped += overflow
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self):
+        """将缓冲区中的记录写入数据库"""
+        if not self._buffer or self._conn is None:
+            return
+        rows, self._buffer = self._buffer, []
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write, rows)
+            self.written += len(rows)
+        except Exception as e:
+            print(f"写入审计日志失败: {str(e)}")
+            # 放回缓冲区等待下次重试
+            self._buffer[:0] = rows
+
+    async def query(self, group_id: str, target: str = None, limit: int = 10) -> list:
+        """按时间倒序查询本群的记录，可按目标 QQ 过滤"""
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(self._executor, self._select, group_id, target, limit)
+        return [AuditRecord(*row) for row in rows]
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _write(self, rows: list):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO audit (ts, group_id, operator, command, target, args, result, latency) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def _select(self, group_id: str, target: str, limit: int) -> list:
+        columns = "ts, group_id, operator, command, target, args, result, latency"
+        if target is None:
+            cursor = self._conn.execute(
+                f"SELECT {columns} FROM audit WHERE group_id = ? ORDER BY id DESC LIMIT ?",
+                (group_id, limit)
+            )
+        else:
+            cursor = self._conn.execute(
+                f"SELECT {columns} FROM audit WHERE group_id = ? AND target = ? ORDER BY id DESC LIMIT ?",
+                (group_id, target, limit)
+            )
+        return cursor.fetchall()
+
+    def stats(self) -> dict:
+        return {"buffered": len(self._buffer), "written": self.written, "dropped": self.dropped}
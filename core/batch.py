@@ -0,0 +1,51 @@
+import asyncio
+from pkg.platform.types import At
+
+
+def parse_targets(args: list, message_chain) -> list:
+    """
+    解析批量操作的目标 QQ 号。
+    消息中包含 @成员 时以 @ 为准，否则按逗号/空格分隔的 QQ 号解析；结果保持顺序并去重。
+    """
+    targets = [str(c.target) for c in message_chain if isinstance(c, At)]
+    if not targets:
+        for arg in args:
+            targets.extend(t.strip() for t in arg.split(",") if t.strip())
+    return list(dict.fromkeys(targets))
+
+
+async def run_batch(targets: list, action, concurrency: int = 10):
+    """
+    以有限并发对每个目标执行 action(target)，返回 (成功列表, [(目标, 错误信息), ...])。
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(target):
+        async with semaphore:
+            try:
+                await action(target)
+                return target, None
+            except Exception as e:
+                return target, str(e)
+
+    results = await asyncio.gather(*(run(t) for t in targets))
+    succeeded = [t for t, error in results if error is None]
+    failed = [(t, error) for t, error in results if error is not None]
+    return succeeded, failed
+
+
+def format_batch_result(action_name: str, succeeded: list, failed: list) -> str:
+    """生成批量操作的汇总消息"""
+    lines = [f"批量{action_name}完成: 成功 {len(succeeded)} 个，失败 {len(failed)} 个"]
+    if succeeded:
+        lines.append("成功: " + ", ".join(succeeded))
+    if failed:
+        lines.append("失败: " + ", ".join(f"{t}({error})" for t, error in failed))
+    return "\n".join(lines)
+
+
+def describe_failures(failed: list) -> str:
+    """批量操作的审计结果说明，全部成功时返回空字符串"""
+    if not failed:
+        return ""
+    return "部分失败: " + ", ".join(f"{t}({error})" for t, error in failed)
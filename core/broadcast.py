@@ -0,0 +1,230 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+from pkg.platform.types import MessageChain
+from plugins.GroupManagerPlugin.core.outbox import TokenBucket
+
+TEXT = "text"
+NOTICE = "notice"
+
+
+class Broadcast:
+    """一次跨群广播及各群的发送结果"""
+    __slots__ = ("id", "set_name", "kind", "content", "creator", "origin", "created", "results")
+
+    def __init__(self, broadcast_id: int, set_name: str, kind: str, content: str, creator: int, origin: str,
+                 groups: list, created: float = None, results: dict = None):
+        self.id = broadcast_id
+        self.set_name = set_name
+        self.kind = kind
+        self.content = content
+        self.creator = creator
+        self.origin = origin  # 发起命令的群，用于回报进度
+        self.created = created or time.time()
+        # 群号 -> None（未发送）/ "" （成功）/ 错误信息
+        self.results = results if results is not None else dict.fromkeys(groups)
+
+    @property
+    def succeeded(self) -> list:
+        return [g for g, r in self.results.items() if r == ""]
+
+    @property
+    def failed(self) -> list:
+        return [(g, r) for g, r in self.results.items() if r]
+
+    @property
+    def remaining(self) -> list:
+        """尚未成功的群（未发送或失败），续发时只发送这些群"""
+        return [g for g, r in self.results.items() if r != ""]
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id, "set_name": self.set_name, "kind": self.kind, "content": self.content,
+            "creator": self.creator, "origin": self.origin, "created": self.created, "results": self.results
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Broadcast":
+        return cls(data["id"], data["set_name"], data["kind"], data["content"], data["creator"], data["origin"],
+                   [], data["created"], data["results"])
+
+
+class BroadcastManager:
+    """
+    跨群广播。向群集合中的每个群并发发送文本或群公告，同时进行的调用数受 concurrency 限制，
+    并由令牌桶控制总速率（文本消息另外经过发送调度器的按群限速）。
+    每个群发送后立即保存结果（并发的保存合并为一次写入），失败或中断的广播续发时跳过已成功的群。
+    广播在独立任务中运行，不占用后台任务队列。
+    """
+
+    def __init__(self, group_api, message_api, path: str, concurrency: int = 5, rate: float = 5,
+                 history: int = 20, group_sets: dict = None):
+        self.group_api = group_api
+        self.message_api = message_api
+        self.path = path
+        self.concurrency = concurrency
+        self.history = history
+        self.group_sets = group_sets or {}
+        self._bucket = TokenBucket(rate, max(1, concurrency))
+        self._broadcasts = {}  # id -> Broadcast
+        self._running = set()
+        self._tasks = {}  # id -> 发送任务
+        self._ids = itertools.count(1)
+        self._requested = 0  # 已请求的保存次数
+        self._saved = 0  # 已完成写入的保存请求
+        self._saver = None
+        self._saved_cond = asyncio.Condition()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(None, self._read)
+            for item in data:
+                broadcast = Broadcast.from_dict(item)
+                self._broadcasts[broadcast.id] = broadcast
+        except Exception as e:
+            print(f"读取广播记录失败: {str(e)}")
+        self._ids = itertools.count(max(self._broadcasts, default=0) + 1)
+
+    def resolve_set(self, name: str, all_groups) -> list:
+        """返回群集合中的群号；all 表示机器人所在的全部群"""
+        if name == "all":
+            return sorted(str(g) for g in all_groups)
+        groups = self.group_sets.get(name)
+        if groups is None:
+            raise Exception(f"未定义的群集合 {name}，可用: {', '.join(['all', *self.group_sets])}")
+        return list(dict.fromkeys(str(g) for g in groups))
+
+    def create(self, set_name: str, kind: str, content: str, creator: int, origin: str, groups: list) -> Broadcast:
+        broadcast = Broadcast(next(self._ids), set_name, kind, content, creator, origin, groups)
+        self._broadcasts[broadcast.id] = broadcast
+        # 只保留最近的 history 条记录
+        for old_id in sorted(self._broadcasts)[:-self.history]:
+            if old_id not in self._running:
+                del self._broadcasts[old_id]
+        return broadcast
+
+    def get(self, broadcast_id: int) -> Broadcast:
+        return self._broadcasts.get(broadcast_id)
+
+    def recent(self) -> list:
+        return sorted(self._broadcasts.values(), key=lambda b: b.id, reverse=True)
+
+    def is_running(self, broadcast_id: int) -> bool:
+        return broadcast_id in self._running
+
+    def launch(self, broadcast: Broadcast, progress=None, progress_interval: float = 10, finished=None):
+        """在独立任务中发送广播，finished 为 async (broadcast, 错误信息或 None)，发送结束后调用"""
+        if broadcast.id in self._running:
+            raise Exception(f"广播 #{broadcast.id} 正在发送中")
+        self._running.add(broadcast.id)
+
+        async def run():
+            error = None
+            try:
+                await self.run(broadcast, progress, progress_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = str(e)
+            finally:
+                self._running.discard(broadcast.id)
+                self._tasks.pop(broadcast.id, None)
+            if finished is not None:
+                try:
+                    await finished(broadcast, error)
+                except Exception as e:
+                    print(f"发送广播结果失败: {str(e)}")
+
+        self._tasks[broadcast.id] = asyncio.create_task(run())
+
+    async def close(self):
+        """取消进行中的广播，已发送的群均已保存，可在重启后续发"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.checkpoint()
+
+    async def run(self, broadcast: Broadcast, progress=None, progress_interval: float = 10):
+        """
+        发送到所有尚未成功的群。progress 为 async (broadcast, 已完成数, 总数)，
+        至少间隔 progress_interval 秒调用一次。
+        """
+        await self.checkpoint()
+        targets = broadcast.remaining
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        done = 0
+        last_report = time.monotonic()
+
+        async def send_one(group_id: str):
+            nonlocal done, last_report
+            async with semaphore:
+                while True:
+                    wait = self._bucket.take()
+                    if not wait:
+                        break
+                    await asyncio.sleep(wait)
+                try:
+                    if broadcast.kind == NOTICE:
+                        await self.group_api.send_group_notice(group_id, broadcast.content)
+                    else:
+                        await self.message_api.send_group_msg(group_id, MessageChain([broadcast.content]))
+                    broadcast.results[group_id] = ""
+                except Exception as e:
+                    broadcast.results[group_id] = str(e) or type(e).__name__
+                # 结果写入文件后才释放并发名额，中途重启后续发不会重复发送已成功的群
+                await self.checkpoint()
+            done += 1
+            if time.monotonic() - last_report >= progress_interval and done < len(targets):
+                last_report = time.monotonic()
+                if progress is not None:
+                    try:
+                        await progress(broadcast, done, len(targets))
+                    except Exception as e:
+                        print(f"发送广播进度失败: {str(e)}")
+
+        await asyncio.gather(*(send_one(g) for g in targets))
+        return broadcast
+
+    async def checkpoint(self):
+        """保存所有广播记录，返回时调用前的结果均已写入；并发的调用合并为一次写入"""
+        self._requested += 1
+        target = self._requested
+        if self._saver is None or self._saver.done():
+            self._saver = asyncio.create_task(self._save_loop())
+        async with self._saved_cond:
+            await self._saved_cond.wait_for(lambda: self._saved >= target)
+
+    async def _save_loop(self):
+        while self._saved < self._requested:
+            target = self._requested
+            await self.save()
+            self._saved = target
+            async with self._saved_cond:
+                self._saved_cond.notify_all()
+
+    async def save(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._write, [b.to_dict() for b in self.recent()])
+        except Exception as e:
+            print(f"保存广播记录失败: {str(e)}")
+
+    def _read(self) -> list:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write(self, data: list):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,126 @@
+import importlib
+import os
+from pkg.platform.types import MessageChain, At, Plain, Quote, Source
+
+
+class Command:
+    """已注册的子命令：处理函数及参数说明"""
+
+    def __init__(self, name: str, handler, args: str = "", description: str = "", min_args: int = 0, audit: bool = False):
+        self.name = name
+        self.handler = handler
+        self.args = args
+        self.description = description
+        self.min_args = min_args
+        self.audit = audit  # 改变群状态的命令，执行结果写入审计日志
+
+    @property
+    def usage(self) -> str:
+        return f"/group {self.name} {self.args}".rstrip()
+
+
+class CommandContext:
+    """单次命令调用的上下文，传给命令处理函数"""
+
+    def __init__(self, plugin, event, group_id: str, sender_id: int, args: list):
+        self.plugin = plugin
+        self.event = event
+        self.group_id = group_id
+        self.sender_id = sender_id
+        self.args = args
+        self.targets = []  # 命令实际操作的成员，供审计日志记录
+        self.result = ""  # 审计日志中的结果说明，为空时按是否抛出异常记录
+        self.audit = True  # 只读的子命令（如 list）置为 False，不写入审计日志
+
+    @property
+    def group_api(self):
+        return self.plugin.group_api
+
+    @property
+    def message_api(self):
+        return self.plugin.message_api
+
+    async def reply(self, content, wait: bool = False):
+        """
+        向命令所在群发送回复，content 可以是文本或消息链；文本回复允许与相邻确认消息合并。
+        默认不等待发送完成，命令处理不被发送队列阻塞，发送失败由发送调度器记录。
+        """
+        if isinstance(content, MessageChain):
+            return await self.plugin.message_api.send_group_msg(self.group_id, content, wait)
+        return await self.plugin.message_api.send_group_msg(self.group_id, MessageChain([content]), wait, coalesce=True)
+
+
+class CommandRegistry:
+    """
+    /group 子命令注册表。
+    子命令名到处理函数的映射，分发为一次字典查找；帮助信息和用法提示均由注册信息生成。
+    """
+
+    def __init__(self, prefix: str = "/group"):
+        self.prefix = prefix
+        self._commands = {}
+
+    def register(self, name: str, handler, args: str = "", description: str = "", min_args: int = 0, audit: bool = False):
+        self._commands[name] = Command(name, handler, args, description, min_args, audit)
+
+    def command(self, name: str, args: str = "", description: str = "", min_args: int = 0, audit: bool = False):
+        """装饰器形式的注册：@registry.command("mute", "<QQ号> <分钟>", "禁言成员", min_args=2, audit=True)"""
+        def decorator(handler):
+            self.register(name, handler, args, description, min_args, audit)
+            return handler
+        return decorator
+
+    def get(self, name: str) -> Command:
+        return self._commands.get(name)
+
+    def names(self) -> list:
+        return list(self._commands)
+
+    @staticmethod
+    def _start(components: list) -> int:
+        """
+        命令文本开始的位置：跳过 Source、回复时的 Quote 和自动带上的 @ 以及其后的空白文本；没有其它组件时返回 -1。
+        """
+        for index, component in enumerate(components):
+            if isinstance(component, (Source, Quote, At)):
+                continue
+            if isinstance(component, Plain) and not component.text.strip():
+                continue
+            return index
+        return -1
+
+    def matches(self, message_chain) -> bool:
+        """
+        廉价的前缀检查：只查看命令文本开始处的组件，避免对每条群消息做完整的字符串化。
+        """
+        components = list(message_chain)
+        index = self._start(components)
+        return index >= 0 and isinstance(components[index], Plain) and components[index].text.lstrip().startswith(self.prefix)
+
+    def command_text(self, message_chain) -> str:
+        """从命令文本开始处字符串化消息链，回复引用和前导 @ 不计入参数"""
+        components = list(message_chain)
+        index = self._start(components)
+        return str(MessageChain(components[index:])).strip() if index >= 0 else ""
+
+    def help_text(self) -> str:
+        lines = [f"{c.usage} - {c.description}" for c in self._commands.values()]
+        return "群管理插件命令列表:\n" + "\n".join(lines)
+
+
+# 全局注册表，各命令模块通过 @registry.command 注册子命令
+registry = CommandRegistry()
+
+
+@registry.command("help", description="显示帮助信息")
+async def help_command(ctx: CommandContext):
+    await ctx.reply(registry.help_text())
+
+
+def load_commands():
+    """导入 commands 目录下的全部命令模块，模块在导入时向 registry 注册子命令"""
+    commands_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "commands")
+    for filename in sorted(os.listdir(commands_dir)):
+        if filename.endswith(".py") and not filename.startswith("_"):
+            importlib.import_module(f"plugins.GroupManagerPlugin.commands.{filename[:-3]}")
+    return registry
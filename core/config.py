@@ -0,0 +1,375 @@
+import asyncio
+import copy
+import os
+from plugins.GroupManagerPlugin.core.join_requests import compile_rules
+
+# 各配置段的默认值，settings.yaml 中缺省的项使用这里的值
+DEFAULT_SECTIONS = {
+    "napcat": {
+        "host": "127.0.0.1",
+        "port": 3000,
+        "limit": 100,
+        "limit_per_host": 30,
+        "keepalive_timeout": 30,
+        "timeout": 10
+    },
+    "websocket": {
+        "enable": False,
+        "host": "127.0.0.1",
+        "port": 3001,
+        "access_token": "",
+        "reconnect_interval": 3,
+        "pending_policy": "replay"
+    },
+    "cache": {
+        "enable": True,
+        "maxsize": 512,
+        "default_ttl": 60,
+        "ttl": {
+            "get_group_info": 300,
+            "get_group_member_list": 120,
+            "get_group_honor_info": 600,
+            "get_essence_msg_list": 300,
+            "get_group_shut_list": 30,
+            "get_group_at_all_remain": 30
+        }
+    },
+    "batch": {
+        "concurrency": 10
+    },
+    "paging": {
+        "page_size": 20,
+        "chunk_chars": 2000,
+        "chunk_lines": 50,
+        "forward_nodes": 50
+    },
+    "outbox": {
+        "enable": True,
+        "group_rate": 1,
+        "group_burst": 5,
+        "global_rate": 10,
+        "global_burst": 20,
+        "coalesce_window": 0.3,
+        "max_queue": 1000
+    },
+    "resilience": {
+        "enable": True,
+        "timeout": 10,
+        "timeouts": {
+            "upload_group_file": 120,
+            "ocr_image": 30
+        },
+        "retries": 2,
+        "backoff": 0.2,
+        "max_backoff": 2,
+        "failure_threshold": 5,
+        "recovery_timeout": 30
+    },
+    "jobs": {
+        "workers": 2,
+        "max_queue": 50,
+        "history": 50
+    },
+    "routing": {
+        "failover": True,
+        "health_interval": 30,
+        "group_refresh_interval": 300
+    },
+    "permissions": {
+        "roles": {},
+        "users": {},
+        "groups": {}
+    },
+    "hot_reload": {
+        "enable": True,
+        "interval": 5
+    },
+    "scheduler": {
+        "enable": True,
+        "path": "plugins/GroupManagerPlugin/data/schedule.json",
+        "max_jobs": 10000,
+        "concurrency": 5
+    },
+    "flood": {
+        "enable": False,
+        "max_messages": 10,
+        "window": 10,
+        "mute_durations": [60, 600, 3600],
+        "offense_reset": 3600,
+        "max_users": 20000,
+        "idle_timeout": 600
+    },
+    "keyword_filter": {
+        "enable": True,
+        "path": "plugins/GroupManagerPlugin/data/keywords.json",
+        "mute_duration": 0,
+        "notify": True
+    },
+    "spam": {
+        "enable": False,
+        "window": 60,
+        "min_senders": 3,
+        "similarity": 0.6,
+        "min_length": 15,
+        "max_entries": 500,
+        "max_groups": 1000,
+        "mute_duration": 0
+    },
+    "join_requests": {
+        "enable": True,
+        "default_action": "review",
+        "whitelist": [],
+        "blacklist": [],
+        "keywords": [],
+        "reject_keywords": [],
+        "min_level": 0,
+        "min_account_days": 0,
+        "quota": 0,
+        "reject_reason": "不符合入群条件",
+        "groups": {},
+        "concurrency": 20,
+        "profile_ttl": 3600,
+        "max_pending": 500
+    },
+    "broadcast": {
+        "path": "plugins/GroupManagerPlugin/data/broadcasts.json",
+        "concurrency": 5,
+        "rate": 5,
+        "progress_interval": 10,
+        "history": 20,
+        "group_sets": {}
+    },
+    "ocr": {
+        "path": "plugins/GroupManagerPlugin/data/ocr_cache.json",
+        "max_entries": 5000,
+        "url_ttl": 86400,
+        "concurrency": 3,
+        "max_images": 20
+    },
+    "warmup": {
+        "enable": True,
+        "path": "plugins/GroupManagerPlugin/data/activity.json",
+        "max_groups": 20,
+        "concurrency": 4,
+        "active_within": 7 * 86400,
+        "timeout": 30,
+        "save_interval": 300
+    },
+    "media": {
+        "enable": False,
+        "path": "plugins/GroupManagerPlugin/data/media",
+        "max_bytes": 512 * 1024 * 1024,
+        "max_file_bytes": 50 * 1024 * 1024,
+        "url_ttl": 86400,
+        "timeout": 120,
+        "napcat_dir": ""
+    },
+    "audit": {
+        "enable": True,
+        "path": "plugins/GroupManagerPlugin/data/audit.db",
+        "flush_interval": 1,
+        "batch_size": 200,
+        "max_buffer": 10000
+    },
+    "metrics": {
+        "enable": True,
+        "prometheus_file": "",
+        "interval": 15
+    }
+}
+
+# 修改后需重启插件才能生效的配置段（传输层、缓存、队列等在初始化时构建）
+RESTART_SECTIONS = ("napcat", "websocket", "backends", "routing", "resilience", "cache", "outbox", "jobs", "metrics", "audit", "scheduler", "flood", "keyword_filter", "spam", "media", "ocr", "warmup", "hot_reload")
+
+
+def default_config() -> dict:
+    return {"admin": [], "backends": [], **copy.deepcopy(DEFAULT_SECTIONS)}
+
+
+def parse_config(data: dict) -> dict:
+    """校验 settings.yaml 的内容并补全缺省项，格式错误时抛出 ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("配置文件格式错误")
+    admin = data.get("admin") or []
+    if not isinstance(admin, list):
+        raise ValueError("admin 字段必须为列表")
+    try:
+        data["admin"] = [int(item) for item in admin]
+    except (TypeError, ValueError):
+        raise ValueError("admin 列表中只能是 QQ 号")
+    # 多后端配置为列表，每项至少包含 port
+    backends = data.get("backends") or []
+    if not isinstance(backends, list):
+        raise ValueError("backends 字段必须为列表")
+    data["backends"] = [b for b in backends if isinstance(b, dict) and "port" in b]
+    # 合并各配置段，缺省项使用默认值
+    for name, defaults in DEFAULT_SECTIONS.items():
+        section = data.get(name)
+        if section is None:
+            section = {}
+        if not isinstance(section, dict):
+            raise ValueError(f"{name} 配置段格式错误")
+        data[name] = {key: section.get(key, copy.deepcopy(value)) for key, value in defaults.items()}
+    # 入群规则在此校验，格式错误的配置不会被热加载替换上去
+    compile_rules(data["join_requests"])
+    return data
+
+
+class PermissionIndex:
+    """
+    由配置编译出的权限索引，每次检查都是集合查找。
+    admin 为全局管理员；permissions.users 为所有群生效的角色，permissions.groups 按群授予角色。
+    角色 admin 表示全部命令，其它角色在 permissions.roles 中列出可执行的命令。
+    """
+
+    def __init__(self, config: dict):
+        permissions = config["permissions"]
+        for key in ("roles", "users", "groups"):
+            if not isinstance(permissions[key] or {}, dict):
+                raise ValueError(f"permissions.{key} 必须为字典")
+        self.roles = {
+            str(name): frozenset(str(command).lower() for command in commands or [])
+            for name, commands in (permissions["roles"] or {}).items()
+        }
+        self.admins = frozenset(config["admin"])
+        self.group_admins = set()  # (group_id, user_id)，该群全部命令
+        self.grants = set()  # (group_id, user_id, command)，group_id 为 None 表示所有群
+        self.operators = set()  # (group_id, user_id)，可执行至少一条命令，用于区分“权限不足”提示
+        for user_id, roles in (permissions["users"] or {}).items():
+            self._grant(None, user_id, roles)
+        for group_id, members in (permissions["groups"] or {}).items():
+            if not isinstance(members, dict):
+                raise ValueError(f"permissions.groups.{group_id} 必须为 QQ号: 角色 的字典")
+            for user_id, roles in members.items():
+                self._grant(str(group_id), user_id, roles)
+
+    def _grant(self, group_id, user_id, roles):
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"无效的 QQ 号 {user_id}")
+        for role in [roles] if isinstance(roles, str) else roles or []:
+            if role == "admin":
+                if group_id is None:
+                    raise ValueError(f"{user_id} 的全局管理员身份请配置在 admin 中")
+                self.group_admins.add((group_id, user_id))
+            elif role in self.roles:
+                self.grants.update((group_id, user_id, command) for command in self.roles[role])
+            else:
+                raise ValueError(f"未定义的角色 {role}")
+            self.operators.add((group_id, user_id))
+
+    def is_operator(self, group_id: str, user_id: int) -> bool:
+        """是否可在该群执行至少一条命令"""
+        return (
+            user_id in self.admins
+            or (group_id, user_id) in self.operators
+            or (None, user_id) in self.operators
+        )
+
+    def allowed(self, group_id: str, user_id: int, command: str) -> bool:
+        return (
+            user_id in self.admins
+            or (group_id, user_id) in self.group_admins
+            or (group_id, user_id, command) in self.grants
+            or (None, user_id, command) in self.grants
+        )
+
+
+class ConfigManager:
+    """
+    配置与权限索引的持有者。按 mtime 监视配置文件，变更后重新加载并整体替换；
+    新配置校验失败时继续使用上一次的有效配置。构造时不读取文件，由 load / load_async 完成首次加载。
+    """
+
+    def __init__(self, path: str, loader):
+        self.path = path
+        self.loader = loader  # 读取并校验配置文件，出错时抛出异常
+        self.listeners = []  # (config, permissions) 回调，配置替换后调用
+        self.last_error = ""
+        self.mtime = 0.0
+        self.current = None
+
+    async def load_async(self):
+        """在线程池中完成首次加载，不阻塞事件循环"""
+        await asyncio.get_running_loop().run_in_executor(None, self.load)
+
+    def load(self):
+        """首次加载配置，文件缺失或有误时使用默认配置"""
+        self.mtime = self._mtime()
+        try:
+            config = self.loader()
+        except FileNotFoundError:
+            print("配置文件不存在，使用默认配置")
+            config = default_config()
+        except Exception as e:
+            print(f"加载配置文件失败: {str(e)}，使用默认配置")
+            self.last_error = str(e)
+            config = default_config()
+        try:
+            permissions = PermissionIndex(config)
+        except ValueError as e:
+            print(f"权限配置错误: {str(e)}，仅 admin 列表生效")
+            self.last_error = str(e)
+            config["permissions"] = copy.deepcopy(DEFAULT_SECTIONS["permissions"])
+            permissions = PermissionIndex(config)
+        # 配置与权限索引作为一个整体替换，读取方不会看到新旧混合的状态
+        self.current = (config, permissions)
+
+    @property
+    def config(self) -> dict:
+        return self.current[0]
+
+    @property
+    def permissions(self) -> PermissionIndex:
+        return self.current[1]
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def _mtime(self) -> float:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return 0.0
+
+    def _parse(self) -> tuple:
+        self.mtime = self._mtime()
+        config = self.loader()
+        return config, PermissionIndex(config)
+
+    async def reload(self) -> bool:
+        """重新加载配置，成功时返回 True；失败时保留当前配置并记录错误。读取与解析在线程中进行，不阻塞事件循环"""
+        try:
+            config, permissions = await asyncio.to_thread(self._parse)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"重新加载配置失败，继续使用上一次的有效配置: {str(e)}")
+            return False
+        old = self.config
+        self.current = (config, permissions)
+        self.last_error = ""
+        changed = [name for name in RESTART_SECTIONS if old.get(name) != config.get(name)]
+        if changed:
+            print(f"配置已重新加载，{', '.join(changed)} 需重启插件后生效")
+        else:
+            print("配置已重新加载")
+        # 监听器依赖的对象已在 loader 中校验过，这里的异常只记录，不影响其它监听器和监视任务
+        for callback in self.listeners:
+            try:
+                callback(config, permissions)
+            except Exception as e:
+                self.last_error = f"应用配置失败: {str(e)}"
+                print(f"应用新配置时出错: {str(e)}")
+        return True
+
+    async def watch(self, interval: float):
+        """定期检查配置文件的修改时间，有变化时重新加载"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self._mtime) != self.mtime:
+                    await self.reload()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"检查配置文件失败: {str(e)}")
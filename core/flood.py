@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict, deque
+
+
+class _Sender:
+    """单个群成员的发言记录：最近 max_messages 条消息的时间和违规次数"""
+    __slots__ = ("times", "offenses", "last_offense", "muted_until", "last_seen")
+
+    def __init__(self, max_messages: int):
+        self.times = deque(maxlen=max_messages)
+        self.offenses = 0
+        self.last_offense = 0.0
+        self.muted_until = 0.0
+        self.last_seen = 0.0
+
+
+class FloodGuard:
+    """
+    刷屏检测。每个 (群, 成员) 用定长环形缓冲记录最近 max_messages 条消息的时间，
+    缓冲写满且最早一条在 window 秒内即判定为刷屏；按违规次数依次使用 mute_durations 中更长的禁言时长，
+    offense_reset 秒内没有再次违规则重新计数。
+    记录按最近发言排序，超过 max_users 或闲置超过 idle_timeout 的成员被淘汰，内存有上限。
+    """
+
+    def __init__(self, max_messages: int = 10, window: float = 10, mute_durations: list = None,
+                 offense_reset: float = 3600, max_users: int = 20000, idle_timeout: float = 600):
+        self.max_messages = max(2, max_messages)
+        self.window = window
+        self.mute_durations = [int(d) for d in mute_durations or [60, 600, 3600]]
+        self.offense_reset = offense_reset
+        self.max_users = max_users
+        self.idle_timeout = idle_timeout
+        self._senders = OrderedDict()  # (group_id, user_id) -> _Sender，最近发言的在末尾
+        self.detected = 0
+        self.evicted = 0
+
+    def check(self, group_id: str, user_id: int, now: float = None) -> int:
+        """记录一条消息，判定为刷屏时返回应禁言的秒数，否则返回 0"""
+        now = time.monotonic() if now is None else now
+        key = (group_id, user_id)
+        sender = self._senders.get(key)
+        if sender is None:
+            sender = self._senders[key] = _Sender(self.max_messages)
+            self._evict(now)
+        else:
+            self._senders.move_to_end(key)
+        sender.last_seen = now
+        times = sender.times
+        times.append(now)
+        if len(times) < self.max_messages or now - times[0] > self.window or now < sender.muted_until:
+            return 0
+        # 判定为刷屏：清空记录，按违规次数升级禁言时长
+        times.clear()
+        if now - sender.last_offense > self.offense_reset:
+            sender.offenses = 0
+        duration = self.mute_durations[min(sender.offenses, len(self.mute_durations) - 1)]
+        sender.offenses += 1
+        sender.last_offense = now
+        sender.muted_until = now + duration
+        self.detected += 1
+        return duration
+
+    def _evict(self, now: float):
+        senders = self._senders
+        while senders:
+            key, oldest = next(iter(senders.items()))
+            # 仍在违规计数期内的成员不因闲置淘汰，避免刚解禁再刷屏时从最短时长重新开始
+            idle = now - oldest.last_seen > self.idle_timeout and now - oldest.last_offense > self.offense_reset
+            if len(senders) <= self.max_users and not idle:
+                break
+            senders.popitem(last=False)
+            self.evicted += 1
+
+    def forget(self, group_id: str, user_id: int):
+        self._senders.pop((group_id, user_id), None)
+
+    def stats(self) -> dict:
+        return {"tracked": len(self._senders), "detected": self.detected, "evicted": self.evicted}
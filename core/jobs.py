@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+
+
+class Job:
+    """后台任务记录"""
+    __slots__ = ("id", "name", "group_id", "description", "status", "error", "created", "started", "finished", "fn")
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, job_id: int, name: str, group_id: str, description: str, fn):
+        self.id = job_id
+        self.name = name
+        self.group_id = group_id
+        self.description = description
+        self.status = self.QUEUED
+        self.error = ""
+        self.created = time.time()
+        self.started = 0.0
+        self.finished = 0.0
+        self.fn = fn
+
+
+class JobQueue:
+    """
+    慢命令（上传文件、OCR、合并转发等）的后台任务队列。
+    固定数量的 worker 从有界队列中取任务执行，完成或失败后通过 notify 回报到对应群。
+    """
+
+    def __init__(self, notify, workers: int = 2, max_queue: int = 50, history: int = 50):
+        self.notify = notify  # async (group_id, text)
+        self.workers = workers
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._ids = itertools.count(1)
+        self._active = {}  # job_id -> Job（排队中或执行中）
+        self._history = deque(maxlen=history)  # 最近结束的任务
+        self._tasks = []
+
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, name: str, group_id: str, description: str, fn) -> Job:
+        """
+        提交任务。fn 为无参协程函数，返回的文本作为完成消息；队列已满时抛出异常。
+        """
+        job = Job(next(self._ids), name, group_id, description, fn)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise Exception(f"任务队列已满（{self._queue.maxsize}），请稍后再试")
+        self._active[job.id] = job
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = Job.RUNNING
+            job.started = time.time()
+            try:
+                result = await job.fn()
+                job.status = Job.DONE
+                message = f"任务 #{job.id} {job.name} 已完成"
+                if result:
+                    message += f":\n{result}"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.status = Job.FAILED
+                job.error = str(e)
+                message = f"任务 #{job.id} {job.name} 失败: {str(e)}"
+            finally:
+                job.finished = time.time()
+                job.fn = None
+                self._active.pop(job.id, None)
+                self._history.append(job)
+                self._queue.task_done()
+            try:
+                await self.notify(job.group_id, message)
+            except Exception as e:
+                print(f"发送任务 #{job.id} 结果失败: {str(e)}")
+
+    def jobs(self, group_id: str = None) -> list:
+        """返回排队中、执行中和最近结束的任务，可按群过滤"""
+        jobs = list(self._active.values()) + list(reversed(self._history))
+        if group_id is not None:
+            jobs = [j for j in jobs if j.group_id == group_id]
+        return jobs
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "running": sum(1 for j in self._active.values() if j.status == Job.RUNNING),
+            "workers": self.workers,
+            "max_queue": self._queue.maxsize
+        }
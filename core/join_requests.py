@@ -0,0 +1,246 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict, deque
+from plugins.GroupManagerPlugin.api.cache import TTLCache
+
+APPROVE = "approve"
+REJECT = "reject"
+REVIEW = "review"
+# 可按群覆盖的规则项
+RULE_KEYS = ("default_action", "whitelist", "blacklist", "keywords", "reject_keywords",
+             "min_level", "min_account_days", "quota", "reject_reason")
+# 用于去重的最近请求 flag 数
+SEEN_FLAGS = 5000
+
+
+class JoinRequest:
+    """一条待处理的加群请求"""
+    __slots__ = ("id", "flag", "sub_type", "group_id", "user_id", "comment", "time", "reason", "self_id",
+                 "quota_slot")
+
+    def __init__(self, request_id: int, flag: str, sub_type: str, group_id: str, user_id: int, comment: str,
+                 reason: str = "", self_id: int = None):
+        self.id = request_id
+        self.flag = flag
+        self.sub_type = sub_type
+        self.group_id = group_id
+        self.user_id = user_id
+        self.comment = comment
+        self.time = time.time()
+        self.reason = reason  # 转人工审核的原因
+        self.self_id = self_id  # 收到请求的机器人账号，处理时路由到该账号的后端
+        self.quota_slot = None  # 自动通过占用的配额时间戳
+
+
+class RuleSet:
+    """单个群生效的入群规则，名单和关键词预先转换为集合与小写字符串，格式错误时抛出 ValueError"""
+
+    def __init__(self, rules: dict, field: str = "join_requests"):
+        self.default_action = rules["default_action"] if rules["default_action"] in (APPROVE, REJECT, REVIEW) else REVIEW
+        self.whitelist = set(_numbers(rules["whitelist"], f"{field}.whitelist", "QQ 号"))
+        self.blacklist = set(_numbers(rules["blacklist"], f"{field}.blacklist", "QQ 号"))
+        self.keywords = [str(k).lower() for k in _items(rules["keywords"], f"{field}.keywords")]
+        self.reject_keywords = [str(k).lower() for k in _items(rules["reject_keywords"], f"{field}.reject_keywords")]
+        self.min_level = _number(rules["min_level"], f"{field}.min_level")
+        self.min_account_days = _number(rules["min_account_days"], f"{field}.min_account_days")
+        self.quota = _number(rules["quota"], f"{field}.quota")
+        self.reject_reason = rules["reject_reason"]
+
+    @property
+    def needs_profile(self) -> bool:
+        return bool(self.min_level or self.min_account_days)
+
+
+def _items(value, field: str) -> list:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ValueError(f"{field} 必须为列表")
+    return value
+
+
+def _numbers(value, field: str, name: str) -> list:
+    items = _items(value, field)
+    try:
+        return [int(item) for item in items]
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} 中只能是 {name}")
+
+
+def _number(value, field: str) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} 必须为整数")
+
+
+def compile_rules(rules: dict) -> dict:
+    """校验并编译全局规则与各群覆盖的规则，返回 {群号或 None: RuleSet}，格式错误时抛出 ValueError"""
+    groups = rules.get("groups") or {}
+    if not isinstance(groups, dict):
+        raise ValueError("join_requests.groups 配置段格式错误")
+    rulesets = {None: RuleSet(rules)}
+    for group_id, override in groups.items():
+        if not override:
+            continue
+        if not isinstance(override, dict):
+            raise ValueError(f"join_requests.groups.{group_id} 配置段格式错误")
+        merged = {key: override.get(key, rules[key]) for key in RULE_KEYS}
+        rulesets[str(group_id)] = RuleSet(merged, f"join_requests.groups.{group_id}")
+    return rulesets
+
+
+class JoinRequestEngine:
+    """
+    加群请求自动处理。NapCat 上报的每个加群请求在独立任务中按规则判定：
+    黑名单拒绝、白名单通过，然后检查验证消息关键词、QQ 等级与账号注册天数，
+    最后按每小时配额决定通过或转人工；无法判定时按 default_action 处理。
+    账号资料带 TTL 缓存，同一账号的并发查询合并；同时进行的 NapCat 调用数受 concurrency 限制。
+    多个机器人账号在同一群时每个账号都会上报同一请求，按 flag 去重，只处理第一次上报。
+    """
+
+    def __init__(self, group_api, rules: dict, concurrency: int = 20, profile_ttl: float = 3600,
+                 max_pending: int = 500, on_decision=None):
+        self.group_api = group_api
+        self.on_decision = on_decision  # (JoinRequest, action, reason)，用于写审计日志
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._profiles = TTLCache(maxsize=5000, default_ttl=profile_ttl)
+        self._pending = OrderedDict()  # id -> JoinRequest，等待人工审核
+        self._approved = {}  # group_id -> deque[通过时间]，用于每小时配额
+        self._ids = itertools.count(1)
+        self._seen = OrderedDict()  # 最近处理过的请求 flag
+        self._rulesets = {}
+        self.update_rules(rules)
+        self.counts = {APPROVE: 0, REJECT: 0, REVIEW: 0}
+
+    def update_rules(self, rules: dict):
+        """替换规则（配置热加载时调用），规则已由 parse_config 校验"""
+        self._rulesets = compile_rules(rules)
+
+    def ruleset(self, group_id: str) -> RuleSet:
+        return self._rulesets.get(str(group_id)) or self._rulesets[None]
+
+    async def on_event(self, event: dict):
+        """处理 NapCat 上报的加群请求事件"""
+        if event.get('post_type') != 'request' or event.get('request_type') != 'group' or event.get('sub_type') != 'add':
+            return
+        flag = event['flag']
+        if flag in self._seen:
+            return
+        self._seen[flag] = True
+        while len(self._seen) > SEEN_FLAGS:
+            self._seen.popitem(last=False)
+        request = JoinRequest(next(self._ids), flag, event['sub_type'], str(event['group_id']),
+                              int(event['user_id']), event.get('comment') or "", self_id=event.get('self_id'))
+        try:
+            action, reason = await self.evaluate(request)
+        except Exception as e:
+            action, reason = REVIEW, f"自动判定失败: {str(e)}"
+        await self.apply(request, action, reason)
+
+    async def evaluate(self, request: JoinRequest):
+        """返回 (处理方式, 原因)"""
+        rules = self.ruleset(request.group_id)
+        if request.user_id in rules.blacklist:
+            return REJECT, "黑名单"
+        if request.user_id in rules.whitelist:
+            return self._check_quota(request, rules, "白名单")
+        comment = request.comment.lower()
+        if any(k in comment for k in rules.reject_keywords):
+            return REJECT, "验证消息包含拒绝关键词"
+        matched = False
+        if rules.keywords:
+            matched = any(k in comment for k in rules.keywords)
+            if not matched:
+                return REJECT, "验证答案不正确"
+        if rules.needs_profile:
+            profile = await self.profile(request.user_id)
+            level = int(profile.get('qqLevel') or profile.get('level') or 0)
+            if level < rules.min_level:
+                return REJECT, f"QQ 等级 {level} 低于 {rules.min_level}"
+            reg_time = int(profile.get('reg_time') or profile.get('regTime') or 0)
+            if reg_time and (time.time() - reg_time) / 86400 < rules.min_account_days:
+                return REJECT, f"账号注册不足 {rules.min_account_days} 天"
+        if matched or rules.default_action == APPROVE:
+            return self._check_quota(request, rules, "验证答案正确" if matched else "符合入群条件")
+        return rules.default_action, "未命中自动规则"
+
+    def _check_quota(self, request: JoinRequest, rules: RuleSet, reason: str):
+        if not rules.quota:
+            return APPROVE, reason
+        approved = self._approved.setdefault(request.group_id, deque())
+        now = time.monotonic()
+        while approved and now - approved[0] > 3600:
+            approved.popleft()
+        if len(approved) >= rules.quota:
+            return REVIEW, f"本小时自动通过已达 {rules.quota} 人"
+        # 判定时即占用配额，避免并发判定的请求同时通过；自动通过失败时在 apply 中归还
+        approved.append(now)
+        request.quota_slot = now
+        return APPROVE, reason
+
+    def _release_quota(self, request: JoinRequest):
+        if request.quota_slot is None:
+            return
+        try:
+            self._approved[request.group_id].remove(request.quota_slot)
+        except (KeyError, ValueError):
+            pass
+        request.quota_slot = None
+
+    async def profile(self, user_id: int) -> dict:
+        profile = self._profiles.get("get_stranger_info", user_id)
+        if profile is None:
+            async with self._semaphore:
+                result = await self.group_api.get_stranger_info(str(user_id))
+            profile = result.get('data') or {}
+            self._profiles.set("get_stranger_info", user_id, profile)
+        return profile
+
+    async def apply(self, request: JoinRequest, action: str, reason: str):
+        """执行判定结果：通过、拒绝或加入人工审核队列；自动处理失败时转人工审核"""
+        rules = self.ruleset(request.group_id)
+        if action != REVIEW:
+            try:
+                async with self._semaphore:
+                    await self.group_api.handle_group_request(
+                        request.flag, action == APPROVE, rules.reject_reason if action == REJECT else "",
+                        request.sub_type, request.group_id, request.self_id
+                    )
+            except Exception as e:
+                self._release_quota(request)
+                action, reason = REVIEW, f"自动{'通过' if action == APPROVE else '拒绝'}失败（{reason}）: {str(e)}"
+        if action == REVIEW:
+            request.reason = reason
+            self._pending[request.id] = request
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+        self.counts[action] += 1
+        if self.on_decision is not None:
+            self.on_decision(request, action, reason)
+
+    def pending(self, group_id: str) -> list:
+        return [r for r in self._pending.values() if r.group_id == group_id]
+
+    async def resolve(self, group_id: str, request_ids: list, approve: bool, reason: str = "") -> tuple:
+        """人工处理待审核请求，返回 (成功的请求, [(请求, 错误信息), ...])"""
+        requests = [self._pending[i] for i in request_ids if i in self._pending and self._pending[i].group_id == group_id]
+
+        async def run(request: JoinRequest):
+            try:
+                async with self._semaphore:
+                    await self.group_api.handle_group_request(
+                        request.flag, approve, reason, request.sub_type, request.group_id, request.self_id
+                    )
+                self._pending.pop(request.id, None)
+                return request, None
+            except Exception as e:
+                return request, str(e)
+
+        results = await asyncio.gather(*(run(r) for r in requests))
+        return [r for r, error in results if error is None], [(r, error) for r, error in results if error is not None]
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), **self.counts}
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+from collections import deque
+
+GLOBAL_SCOPE = "*"
+
+
+class Automaton:
+    """
+    Aho-Corasick 多模式匹配自动机。构建后一次扫描文本即可找出所有命中的关键词，
+    耗时与文本长度成正比，与关键词数量无关。
+    """
+    __slots__ = ("_goto", "_fail", "_out")
+
+    def __init__(self, patterns):
+        goto = [{}]
+        out = [()]
+        for pattern in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] = (pattern,)
+        # 按层次遍历建立失败指针，并把失败指针上的输出合并到当前节点
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(ch, 0)
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def iter_matches(self, text: str):
+        """依次产出文本中命中的关键词"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield from out[node]
+
+
+class KeywordFilter:
+    """
+    违禁词过滤。关键词分为全局和按群两种范围，共用一个自动机，命中后再检查范围。
+    增删关键词后在后台线程重建自动机，重建期间继续使用旧自动机，消息处理不会等待。
+    """
+
+    def __init__(self, path: str, mute_duration: int = 0, notify: bool = True):
+        self.path = path
+        self.mute_duration = mute_duration  # 命中后禁言的秒数，0 表示只撤回
+        self.notify = notify
+        self._scopes = {}  # 关键词（小写）-> {群号或 "*"}
+        self._automaton = Automaton(())
+        self._rebuild_task = None
+        self._dirty = False
+        self.matched = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(None, self._read)
+            self._scopes = {pattern: set(scopes) for pattern, scopes in data.items() if pattern}
+        except Exception as e:
+            print(f"读取违禁词失败: {str(e)}")
+        self._schedule_rebuild()
+
+    async def close(self):
+        if self._rebuild_task is not None:
+            await asyncio.gather(self._rebuild_task, return_exceptions=True)
+
+    def match(self, group_id: str, text: str) -> str:
+        """返回本群生效的第一个命中关键词，没有命中时返回 None"""
+        scopes = self._scopes
+        for pattern in self._automaton.iter_matches(text.lower()):
+            scope = scopes.get(pattern)
+            # 自动机可能仍包含刚删除的关键词，以当前关键词表为准
+            if scope is not None and (GLOBAL_SCOPE in scope or group_id in scope):
+                self.matched += 1
+                return pattern
+        return None
+
+    def add(self, patterns: list, scope: str) -> list:
+        """添加关键词，返回实际新增的关键词"""
+        added = []
+        for pattern in patterns:
+            pattern = pattern.strip().lower()
+            if not pattern:
+                continue
+            scopes = self._scopes.setdefault(pattern, set())
+            if scope not in scopes:
+                scopes.add(scope)
+                added.append(pattern)
+        if added:
+            self._schedule_rebuild()
+        return added
+
+    def remove(self, patterns: list, scope: str) -> list:
+        """删除关键词，返回实际删除的关键词"""
+        removed = []
+        for pattern in patterns:
+            pattern = pattern.strip().lower()
+            scopes = self._scopes.get(pattern)
+            if scopes is None or scope not in scopes:
+                continue
+            scopes.discard(scope)
+            if not scopes:
+                del self._scopes[pattern]
+            removed.append(pattern)
+        if removed:
+            self._schedule_rebuild()
+        return removed
+
+    def patterns(self, scope: str) -> list:
+        return sorted(p for p, scopes in self._scopes.items() if scope in scopes)
+
+    def _schedule_rebuild(self):
+        """合并连续的修改，只在后台保留一个重建任务"""
+        self._dirty = True
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._rebuild())
+
+    async def _rebuild(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            self._dirty = False
+            snapshot = {pattern: sorted(scopes) for pattern, scopes in self._scopes.items()}
+            try:
+                self._automaton = await loop.run_in_executor(None, Automaton, list(snapshot))
+                await loop.run_in_executor(None, self._write, snapshot)
+            except Exception as e:
+                print(f"重建违禁词自动机失败: {str(e)}")
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, data: dict):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> dict:
+        return {"patterns": len(self._scopes), "matched": self.matched}
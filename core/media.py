@@ -0,0 +1,246 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import mimetypes
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+import aiohttp
+from plugins.GroupManagerPlugin.api.resilience import NapCatUnavailableError
+from plugins.GroupManagerPlugin.api.singleflight import SingleFlight
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MediaCache:
+    """
+    本地媒体缓存。远程图片、语音和文件下载后以内容的 SHA-256 命名保存，相同内容只存一份；
+    URL 到内容哈希的映射在 url_ttl 秒内有效，之后重新下载校验。
+    下载以流的方式分块写入磁盘并同时计算哈希，同一 URL 的并发请求共享一次下载；
+    总大小超过 max_bytes 时按最近使用顺序淘汰，正在发送的文件不会被淘汰。缓存的文件以 file:// 路径交给 NapCat，
+    NapCat 与插件不在同一文件系统时，napcat_dir 指定 NapCat 看到的缓存目录；NapCat 无法读取该路径时改用原 URL。
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, max_file_bytes: int = 50 * 1024 * 1024,
+                 url_ttl: float = 86400, timeout: float = 120, napcat_dir: str = ""):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.url_ttl = url_ttl
+        self.timeout = timeout
+        self.napcat_dir = napcat_dir
+        self.singleflight = SingleFlight()
+        self._urls = {}  # url -> [内容哈希, 下载时间]
+        self._objects = OrderedDict()  # 文件名（哈希 + 扩展名）-> 大小，最近使用的在末尾
+        self._size = 0
+        self._pins = {}  # 文件名 -> 正在使用该文件的发送数，淘汰时跳过
+        self._session = None
+        self._save_task = None
+        self._dirty = False
+        self.hits = 0
+        self.downloads = 0
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.path, "index.json")
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            index = await loop.run_in_executor(None, self._read_index)
+            self._urls = index.get("urls", {})
+            for name, size in index.get("objects", []):
+                self._objects[name] = size
+                self._size += size
+        except Exception as e:
+            print(f"读取媒体缓存索引失败: {str(e)}")
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        if self._save_task is not None:
+            await asyncio.gather(self._save_task, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @contextlib.asynccontextmanager
+    async def lease(self, url: str):
+        """缓存 URL 的内容并在 with 块内保留该文件不被淘汰，产出缓存文件名；无法缓存时产出 None"""
+        name = None
+        if urlparse(url).scheme in ("http", "https"):
+            try:
+                name = await self.fetch(url)
+                if name not in self._objects:
+                    # 等待共享下载结果期间被其它下载淘汰
+                    name = await self.fetch(url)
+            except Exception as e:
+                print(f"缓存媒体 {url} 失败，交由 NapCat 直接下载: {str(e)}")
+                name = None
+        if name is None:
+            yield None
+            return
+        self._pins[name] = self._pins.get(name, 0) + 1
+        try:
+            yield name
+        finally:
+            self._pins[name] -= 1
+            if not self._pins[name]:
+                del self._pins[name]
+
+    async def send(self, url: str, send):
+        """
+        以缓存文件的 file:// 路径调用 send(地址)，发送期间文件不会被淘汰。
+        无法缓存，或 NapCat 返回错误（如容器内读不到该路径）时以原 URL 调用；连接失败、超时不重试，避免重复发送。
+        """
+        async with self.lease(url) as name:
+            if name is not None:
+                address = self.file_uri(name)
+                try:
+                    return await send(address)
+                except (NapCatUnavailableError, aiohttp.ClientError, asyncio.TimeoutError):
+                    raise
+                except Exception as e:
+                    print(f"NapCat 无法使用缓存文件 {address}，改用原 URL: {str(e)}")
+        return await send(url)
+
+    def file_uri(self, name: str) -> str:
+        """缓存文件在 NapCat 一侧的 file:// 路径"""
+        directory = self.napcat_dir or os.path.abspath(self.path)
+        return "file://" + os.path.join(directory, "objects", name[:2], name)
+
+    async def fetch(self, url: str) -> str:
+        """确保 URL 的内容在缓存中，返回缓存文件名"""
+        entry = self._urls.get(url)
+        if entry is not None and time.time() - entry[1] < self.url_ttl:
+            name = entry[0]
+            if name in self._objects and os.path.exists(self._object_path(name)):
+                self._objects.move_to_end(name)
+                self.hits += 1
+                self._changed()
+                return name
+        return await self.singleflight.do(url, lambda: self._download(url))
+
+    async def _download(self, url: str) -> str:
+        loop = asyncio.get_running_loop()
+        tmp_dir = os.path.join(self.path, "tmp")
+        await loop.run_in_executor(None, lambda: os.makedirs(tmp_dir, exist_ok=True))
+        tmp_path = os.path.join(tmp_dir, f"{os.getpid()}-{id(url)}-{time.monotonic_ns()}")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with self._session.get(url) as response:
+                if response.status != 200:
+                    raise Exception(f"下载失败，HTTP {response.status}")
+                if (response.content_length or 0) > self.max_file_bytes:
+                    raise Exception(f"文件大小超过 {self.max_file_bytes} 字节")
+                ext = self._extension(url, response.content_type)
+                with open(tmp_path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_file_bytes:
+                            raise Exception(f"文件大小超过 {self.max_file_bytes} 字节")
+                        digest.update(chunk)
+                        await loop.run_in_executor(None, f.write, chunk)
+            name = digest.hexdigest() + ext
+            path = self._object_path(name)
+            await loop.run_in_executor(None, self._commit, tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.downloads += 1
+        if name not in self._objects:
+            self._objects[name] = size
+            self._size += size
+        self._objects.move_to_end(name)
+        self._urls[url] = [name, time.time()]
+        await self._evict()
+        self._changed()
+        return name
+
+    @staticmethod
+    def _commit(tmp_path: str, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            # 内容相同的文件已缓存（不同 URL 指向同一内容）
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def _extension(url: str, content_type: str) -> str:
+        # 保留扩展名，便于 NapCat 按类型识别文件
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        if not ext or len(ext) > 8:
+            ext = mimetypes.guess_extension(content_type or "") or ""
+        return ext
+
+    def _object_path(self, name: str) -> str:
+        return os.path.join(self.path, "objects", name[:2], name)
+
+    async def _evict(self):
+        """超出容量时删除最久未使用的文件（保留刚加入的文件和正在发送的文件）"""
+        removed = []
+        newest = next(reversed(self._objects), None)
+        while self._size > self.max_bytes:
+            name = next((n for n in self._objects if n not in self._pins and n != newest), None)
+            if name is None:
+                break
+            self._size -= self._objects.pop(name)
+            removed.append(name)
+        if not removed:
+            return
+        removed_set = set(removed)
+        self._urls = {url: entry for url, entry in self._urls.items() if entry[0] not in removed_set}
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._remove_files, [self._object_path(n) for n in removed])
+
+    @staticmethod
+    def _remove_files(paths: list):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _changed(self):
+        """标记索引已变更，延迟合并写入"""
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            await asyncio.sleep(1)
+            self._dirty = False
+            index = {"urls": dict(self._urls), "objects": list(self._objects.items())}
+            try:
+                await loop.run_in_executor(None, self._write_index, index)
+            except Exception as e:
+                print(f"保存媒体缓存索引失败: {str(e)}")
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_index(self, index: dict):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self._index_path)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._objects),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "downloads": self.downloads
+        }
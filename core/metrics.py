@@ -0,0 +1,157 @@
+import asyncio
+import bisect
+import os
+import time
+
+# 延迟直方图的桶上界（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Series:
+    """单个接口或命令的统计：调用次数、错误次数、进行中数量和延迟直方图"""
+    __slots__ = ("counts", "sum", "total", "errors", "inflight")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 最后一个桶为 +Inf
+        self.sum = 0.0
+        self.total = 0
+        self.errors = 0
+        self.inflight = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.total += 1
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """按直方图估算分位数（秒），桶内线性插值"""
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return BUCKETS[-1]
+
+
+class Tracker:
+    """with 语句形式的计时器：进入时计入进行中数量，退出时记录耗时及是否出错"""
+    __slots__ = ("series", "started")
+
+    def __init__(self, series: Series):
+        self.series = series
+        self.started = 0.0
+
+    def __enter__(self):
+        self.series.inflight += 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.series.inflight -= 1
+        self.series.observe(time.perf_counter() - self.started, exc_type is not None)
+        return False
+
+
+class Metrics:
+    """
+    插件运行指标。记录 NapCat 接口与 /group 命令的调用次数、错误、进行中数量及延迟分布，
+    可导出为 Prometheus 文本格式。
+    """
+
+    def __init__(self):
+        self._series = {"napcat": {}, "command": {}}
+        self._gauges = []  # 返回 {指标名: 值} 的回调，用于导出缓存、队列等状态
+
+    def series(self, kind: str, name: str) -> Series:
+        table = self._series[kind]
+        series = table.get(name)
+        if series is None:
+            series = table[name] = Series()
+        return series
+
+    def track(self, kind: str, name: str) -> Tracker:
+        return Tracker(self.series(kind, name))
+
+    def items(self, kind: str) -> list:
+        return list(self._series[kind].items())
+
+    def add_gauges(self, callback):
+        """注册状态指标回调"""
+        self._gauges.append(callback)
+
+    def render_prometheus(self) -> str:
+        """生成 Prometheus 文本格式的指标"""
+        lines = []
+        for kind, label in (("napcat", "endpoint"), ("command", "command")):
+            prefix = f"groupmanager_{kind}"
+            lines.append(f"# TYPE {prefix}_requests_total counter")
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            lines.append(f"# TYPE {prefix}_inflight gauge")
+            lines.append(f"# TYPE {prefix}_seconds histogram")
+            for name, s in self.items(kind):
+                tag = f'{label}="{name}"'
+                lines.append(f"{prefix}_requests_total{{{tag}}} {s.total}")
+                lines.append(f"{prefix}_errors_total{{{tag}}} {s.errors}")
+                lines.append(f"{prefix}_inflight{{{tag}}} {s.inflight}")
+                cumulative = 0
+                for bound, count in zip(BUCKETS, s.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_seconds_bucket{{{tag},le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_seconds_bucket{{{tag},le="+Inf"}} {s.total}')
+                lines.append(f"{prefix}_seconds_sum{{{tag}}} {s.sum:.6f}")
+                lines.append(f"{prefix}_seconds_count{{{tag}}} {s.total}")
+        for callback in self._gauges:
+            try:
+                for name, value in callback().items():
+                    lines.append(f"# TYPE groupmanager_{name} gauge")
+                    lines.append(f"groupmanager_{name} {value}")
+            except Exception as e:
+                print(f"采集指标失败: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+    async def export_loop(self, path: str, interval: float):
+        """定期将指标写入 Prometheus 文本文件（供 node_exporter textfile collector 采集）"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self._write_file, path, self.render_prometheus())
+            except Exception as e:
+                print(f"写入指标文件失败: {str(e)}")
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def _write_file(path: str, content: str):
+        # 先写临时文件再原子替换，避免采集到写了一半的文件
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+class MeteredTransport:
+    """记录每个 NapCat 接口调用的次数、错误、进行中数量和延迟"""
+
+    def __init__(self, inner, metrics: Metrics):
+        self.inner = inner
+        self.metrics = metrics
+
+    async def start(self):
+        await self.inner.start()
+
+    async def close(self):
+        await self.inner.close()
+
+    def add_event_listener(self, callback):
+        self.inner.add_event_listener(callback)
+
+    async def request(self, method: str, action: str, data: dict = None, error: str = "请求失败", timeout: float = None,
+                      **route):
+        with self.metrics.track("napcat", action):
+            return await self.inner.request(method, action, data, error, timeout, **route)
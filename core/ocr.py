@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from plugins.GroupManagerPlugin.api.message import OCR_NO_TEXT
+from plugins.GroupManagerPlugin.api.singleflight import SingleFlight
+
+
+class OcrCache:
+    """
+    持久化的 OCR 结果缓存，按 URL 与图片内容哈希两级索引。
+    启用媒体缓存时图片先下载到本地，识别结果以内容哈希为键，不同 URL 指向同一张图也只识别一次；
+    未启用时以 URL 为键。URL 映射在 url_ttl 秒内有效，结果条目超过 max_entries 时按最近使用淘汰，未识别到文本的结果不缓存。
+    同一图片的并发识别共享一次调用，recognize_many 以 concurrency 限制同时识别的图片数。
+    """
+
+    def __init__(self, message_api, media, path: str, max_entries: int = 5000, url_ttl: float = 86400,
+                 concurrency: int = 3, save_delay: float = 2):
+        self.message_api = message_api
+        self.media = media
+        self.path = path
+        self.max_entries = max_entries
+        self.url_ttl = url_ttl
+        self.save_delay = save_delay
+        self.singleflight = SingleFlight()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._urls = {}  # url -> [结果键, 记录时间]
+        self._results = OrderedDict()  # 结果键 -> 识别文本，最近使用的在末尾
+        self._save_task = None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(None, self._read)
+        except Exception as e:
+            print(f"读取 OCR 缓存失败: {str(e)}")
+            return
+        self._urls = data.get("urls", {})
+        self._results = OrderedDict(data.get("results", []))
+
+    async def close(self):
+        if self._save_task is not None:
+            await asyncio.gather(self._save_task, return_exceptions=True)
+
+    async def recognize(self, url: str) -> str:
+        """识别一张图片，优先返回缓存的结果"""
+        entry = self._urls.get(url)
+        if entry is not None and time.time() - entry[1] < self.url_ttl and entry[0] in self._results:
+            self._results.move_to_end(entry[0])
+            self.hits += 1
+            return self._results[entry[0]]
+        return await self.singleflight.do(url, lambda: self._recognize(url))
+
+    async def _recognize(self, url: str) -> str:
+        if self.media is None:
+            return await self._store(url, f"url:{url}", url)
+        async with self.media.lease(url) as name:
+            if name is None:
+                return await self._store(url, f"url:{url}", url)
+            return await self._store(url, os.path.splitext(name)[0], self.media.file_uri(name))
+
+    async def _store(self, url: str, key: str, image: str) -> str:
+        text = self._results.get(key) if not key.startswith("url:") else None
+        if text is not None:
+            # URL 不同但内容相同的图片
+            self.hits += 1
+        else:
+            self.misses += 1
+            text = await self.message_api.ocr_image(image)
+            if not text or text == OCR_NO_TEXT:
+                # 未识别到文本可能是临时失败，不缓存，下次重新识别
+                return text
+        self._results[key] = text
+        self._results.move_to_end(key)
+        self._urls[url] = [key, time.time()]
+        self._evict()
+        self._changed()
+        return text
+
+    async def recognize_many(self, urls: list) -> list:
+        """并发识别多张图片，返回与 urls 顺序一致的 (识别文本, 错误信息) 列表"""
+        async def one(url):
+            async with self._semaphore:
+                try:
+                    return await self.recognize(url), None
+                except Exception as e:
+                    return None, str(e)
+
+        return await asyncio.gather(*(one(url) for url in urls))
+
+    def _evict(self):
+        removed = set()
+        while len(self._results) > self.max_entries:
+            removed.add(self._results.popitem(last=False)[0])
+        now = time.time()
+        if removed or len(self._urls) > self.max_entries * 2:
+            self._urls = {
+                url: entry for url, entry in self._urls.items()
+                if entry[0] not in removed and now - entry[1] < self.url_ttl
+            }
+
+    def _changed(self):
+        """标记已变更，延迟合并写入"""
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            await asyncio.sleep(self.save_delay)
+            self._dirty = False
+            data = {"urls": dict(self._urls), "results": list(self._results.items())}
+            try:
+                await loop.run_in_executor(None, self._write, data)
+            except Exception as e:
+                print(f"保存 OCR 缓存失败: {str(e)}")
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, data: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._results), "hits": self.hits, "misses": self.misses}
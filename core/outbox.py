@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import deque
+from pkg.platform.types import MessageChain
+
+
+class TokenBucket:
+    """令牌桶限速器：rate 为每秒补充的令牌数，burst 为桶容量"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """尝试取走一个令牌，成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class _Outgoing:
+    """待发送的消息；可合并的纯文本消息会累积多段文本并共享同一个 future"""
+    __slots__ = ("chain", "texts", "created", "future")
+
+    def __init__(self, chain, texts: list, future):
+        self.chain = chain
+        self.texts = texts
+        self.created = time.monotonic()
+        self.future = future
+
+
+class SendScheduler:
+    """
+    群消息发送调度器。
+    每个群一个有序队列，按群和全局两级令牌桶限速。空闲时消息立即发送；排队等待限速期间，
+    同一群在 coalesce_window 秒内产生的确认类文本消息合并为一条发送。
+    """
+
+    def __init__(self, deliver, group_rate: float = 1, group_burst: int = 5, global_rate: float = 10,
+                 global_burst: int = 20, coalesce_window: float = 0.3, max_queue: int = 1000):
+        self.deliver = deliver  # async (group_id, message_chain) -> result
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.coalesce_window = coalesce_window
+        self.max_queue = max_queue
+        self._global_bucket = TokenBucket(global_rate, global_burst)
+        self._group_buckets = {}
+        self._queues = {}  # group_id -> deque[_Outgoing]
+        self._workers = {}  # group_id -> Task
+        self._depth = 0
+        self._counters = {"sent": 0, "merged": 0, "failed": 0, "rejected": 0, "group_throttled": 0, "global_throttled": 0}
+
+    async def send(self, group_id: str, message_chain, wait: bool = True, coalesce: bool = False):
+        """
+        将消息加入发送队列。wait 为 True 时等待实际发送完成并返回结果，否则立即返回 future。
+        coalesce 为 True 时，消息链必须为纯文本，可能与相邻的确认消息合并。
+        """
+        group_id = str(group_id)
+        queue = self._queues.setdefault(group_id, deque())
+        if coalesce and queue:
+            tail = queue[-1]
+            if tail.texts is not None and time.monotonic() - tail.created <= self.coalesce_window:
+                tail.texts.append(str(message_chain))
+                self._counters["merged"] += 1
+                return await tail.future if wait else tail.future
+        if self._depth >= self.max_queue:
+            self._counters["rejected"] += 1
+            raise Exception("发送队列已满，消息被丢弃")
+        future = asyncio.get_running_loop().create_future()
+        if not wait:
+            future.add_done_callback(self._report_failure)
+        queue.append(_Outgoing(message_chain, [str(message_chain)] if coalesce else None, future))
+        self._depth += 1
+        if group_id not in self._workers:
+            self._workers[group_id] = asyncio.create_task(self._drain(group_id))
+        return await future if wait else future
+
+    async def _drain(self, group_id: str):
+        queue = self._queues[group_id]
+        bucket = self._group_buckets.setdefault(group_id, TokenBucket(self.group_rate, self.group_burst))
+        try:
+            while queue:
+                item = queue[0]
+                # 队首消息不等待合并窗口；被限速时仍留在队首，期间到达的确认消息可并入
+                await self._acquire(bucket, "group_throttled")
+                await self._acquire(self._global_bucket, "global_throttled")
+                queue.popleft()
+                self._depth -= 1
+                chain = item.chain if item.texts is None else MessageChain(["\n".join(item.texts)])
+                try:
+                    result = await self.deliver(group_id, chain)
+                    self._counters["sent"] += 1
+                    if not item.future.done():
+                        item.future.set_result(result)
+                except Exception as e:
+                    self._counters["failed"] += 1
+                    if not item.future.done():
+                        item.future.set_exception(e)
+        finally:
+            self._workers.pop(group_id, None)
+            if not queue:
+                self._queues.pop(group_id, None)
+
+    async def _acquire(self, bucket: TokenBucket, counter: str):
+        delay = bucket.take()
+        if delay:
+            self._counters[counter] += 1
+        while delay:
+            await asyncio.sleep(delay)
+            delay = bucket.take()
+
+    @staticmethod
+    def _report_failure(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"群消息发送失败: {str(future.exception())}")
+
+    async def close(self, timeout: float = 5):
+        """等待队列中的消息发送完毕，超时后取消剩余发送"""
+        workers = list(self._workers.values())
+        if workers:
+            _, pending = await asyncio.wait(workers, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        for queue in self._queues.values():
+            for item in queue:
+                if not item.future.done():
+                    item.future.set_exception(Exception("发送调度器已关闭"))
+        self._queues.clear()
+        self._depth = 0
+
+    def stats(self) -> dict:
+        """返回队列深度与限速统计"""
+        return {
+            "depth": self._depth,
+            "groups": {group_id: len(queue) for group_id, queue in self._queues.items() if queue},
+            **self._counters
+        }
@@ -0,0 +1,89 @@
+import math
+from itertools import islice
+
+
+def split_page_args(args: list, keep: int = 0):
+    """
+    从命令参数末尾取出页码或 all，返回 (剩余参数, 页码, 是否全部导出)。
+    keep 为子命令本身需要的参数个数，不足时不把最后一个参数当作页码。
+    """
+    if len(args) > keep:
+        last = args[-1].lower()
+        if last == "all":
+            return args[:-1], 1, True
+        if last.isdigit():
+            return args[:-1], int(last), False
+    return args, 1, False
+
+
+def paginate(items, total: int, page: int, per_page: int):
+    """按页取出条目，只遍历到所需页为止，返回 (本页条目, 实际页码, 总页数)"""
+    pages = max(1, math.ceil(total / per_page))
+    page = min(max(1, page), pages)
+    start = (page - 1) * per_page
+    return list(islice(items, start, start + per_page)), page, pages
+
+
+def page_footer(command: str, page: int, pages: int) -> str:
+    if pages <= 1:
+        return ""
+    footer = f"\n第 {page}/{pages} 页"
+    if page < pages:
+        footer += f"，下一页: {command} {page + 1}"
+    return footer + f"，全部: {command} all"
+
+
+def chunk_lines(lines, max_chars: int = 2000, max_lines: int = 50):
+    """把逐行产生的文本按需合并为不超过 max_chars 字符、max_lines 行的块"""
+    chunk, size = [], 0
+    for line in lines:
+        if chunk and (size + len(line) > max_chars or len(chunk) >= max_lines):
+            yield "\n".join(chunk)
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line) + 1
+    if chunk:
+        yield "\n".join(chunk)
+
+
+async def send_forward_dump(message_api, group_id: str, sender_id: int, title: str, lines,
+                            chunk_chars: int = 2000, chunk_lines_max: int = 50, forward_nodes: int = 50) -> int:
+    """
+    以合并转发的形式发送完整列表：每个转发节点是一块文本，节点数达到 forward_nodes 时发送一条转发消息。
+    lines 可以是生成器，文本逐块生成，不会拼接成一个大字符串。返回发送的转发消息数。
+    """
+    nodes = [title]
+    sent = 0
+    for chunk in chunk_lines(lines, chunk_chars, chunk_lines_max):
+        nodes.append(chunk)
+        if len(nodes) >= forward_nodes:
+            await message_api.send_group_forward_message(group_id, nodes, sender_id)
+            sent += 1
+            nodes = []
+    if nodes:
+        await message_api.send_group_forward_message(group_id, nodes, sender_id)
+        sent += 1
+    return sent
+
+
+async def reply_list(ctx, command: str, title: str, items: list, format_item, page: int = 1, dump: bool = False):
+    """
+    回复列表：默认只格式化所请求的一页；dump 时在后台任务中以合并转发发送全部条目。
+    """
+    config = ctx.plugin.config["paging"]
+    if dump:
+        lines = (format_item(item) for item in items)
+
+        async def run():
+            sent = await send_forward_dump(
+                ctx.message_api, ctx.group_id, ctx.sender_id, title, lines,
+                config["chunk_chars"], config["chunk_lines"], config["forward_nodes"]
+            )
+            return f"{title}，已通过 {sent} 条合并转发消息发送"
+
+        job = ctx.plugin.jobs.submit(command.split()[1], ctx.group_id, title, run)
+        await ctx.reply(f"共 {len(items)} 条，正在整理为合并转发消息，任务 #{job.id}")
+        return
+    shown, page, pages = paginate(items, len(items), page, config["page_size"])
+    body = "\n".join(format_item(item) for item in shown)
+    await ctx.reply(f"{title}:\n{body}{page_footer(command, page, pages)}")
@@ -0,0 +1,186 @@
+import asyncio
+import sys
+import time
+from plugins.GroupManagerPlugin.api.group import GroupAPI
+
+
+class Member:
+    """群成员记录，使用 __slots__ 压缩大群的内存占用"""
+    __slots__ = ("user_id", "nickname", "card", "role", "level", "join_time", "last_sent_time", "_key")
+
+    def __init__(self, user_id: int, nickname: str = "", card: str = "", role: str = "member",
+                 level: int = 0, join_time: int = 0, last_sent_time: int = 0):
+        self.user_id = user_id
+        self.nickname = nickname
+        self.card = card
+        self.role = sys.intern(role)
+        self.level = level
+        self.join_time = join_time
+        self.last_sent_time = last_sent_time
+        self._key = f"{card}\x00{nickname}".lower()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Member":
+        """由 get_group_member_list / 事件中的成员字典构造"""
+        try:
+            level = int(data.get('level') or 0)
+        except (TypeError, ValueError):
+            level = 0
+        return cls(
+            int(data['user_id']),
+            data.get('nickname') or "",
+            data.get('card') or "",
+            data.get('role') or "member",
+            level,
+            int(data.get('join_time') or 0),
+            int(data.get('last_sent_time') or 0)
+        )
+
+    def rename(self, card: str):
+        self.card = card
+        self._key = f"{card}\x00{self.nickname}".lower()
+
+    @property
+    def display_name(self) -> str:
+        return self.card or self.nickname
+
+
+class Roster:
+    """单个群的成员索引，支持按 QQ 号查找、昵称/群名片搜索及按角色、等级、发言时间筛选"""
+
+    def __init__(self, group_id: str):
+        self.group_id = group_id
+        self.loaded_at = 0.0
+        self._members = {}  # user_id -> Member
+
+    def load(self, members: list):
+        self._members = {}
+        for data in members:
+            member = Member.from_dict(data)
+            self._members[member.user_id] = member
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._members)
+
+    def __iter__(self):
+        return iter(self._members.values())
+
+    def get(self, user_id) -> Member:
+        return self._members.get(int(user_id))
+
+    def upsert(self, member: Member):
+        self._members[member.user_id] = member
+
+    def remove(self, user_id):
+        self._members.pop(int(user_id), None)
+
+    def set_role(self, user_id, role: str):
+        member = self.get(user_id)
+        if member is not None:
+            member.role = sys.intern(role)
+
+    def touch(self, user_id, timestamp: int):
+        """记录成员最近发言时间"""
+        member = self.get(user_id)
+        if member is not None:
+            member.last_sent_time = timestamp
+
+    def search(self, keyword: str) -> list:
+        """按昵称/群名片子串（不区分大小写）或 QQ 号前缀搜索"""
+        keyword = keyword.lower()
+        return [m for m in self._members.values() if keyword in m._key or str(m.user_id).startswith(keyword)]
+
+    def filter(self, role: str = None, min_level: int = None, inactive_since: int = None) -> list:
+        """
+        按条件筛选成员。inactive_since 为时间戳，返回在此之前未发言的成员。
+        """
+        result = []
+        for m in self._members.values():
+            if role is not None and m.role != role:
+                continue
+            if min_level is not None and m.level < min_level:
+                continue
+            if inactive_since is not None and m.last_sent_time >= inactive_since:
+                continue
+            result.append(m)
+        return result
+
+
+class RosterManager:
+    """
+    各群成员索引的管理器。
+    每个群首次使用时加载一次成员列表，之后由 NapCat 的入群/退群/管理员变更事件增量更新。
+    没有事件来源（HTTP 模式）时索引无法增量更新，max_age 秒后重新拉取成员列表；为 None 时不过期。
+    """
+
+    def __init__(self, group_api: GroupAPI, max_age: float = None):
+        self.group_api = group_api
+        self.max_age = max_age
+        self._rosters = {}  # group_id -> Roster
+        self._loading = {}  # group_id -> 正在进行的加载任务
+
+    async def get(self, group_id: str) -> Roster:
+        """获取群成员索引，未加载时拉取成员列表；并发调用共享同一次加载"""
+        group_id = str(group_id)
+        roster = self._rosters.get(group_id)
+        if roster is not None and (self.max_age is None or time.monotonic() - roster.loaded_at < self.max_age):
+            return roster
+        task = self._loading.get(group_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(group_id))
+            self._loading[group_id] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, group_id: str) -> Roster:
+        try:
+            result = await self.group_api.get_group_member_list(group_id)
+            roster = Roster(group_id)
+            roster.load(result.get('data') or [])
+            self._rosters[group_id] = roster
+            return roster
+        finally:
+            self._loading.pop(group_id, None)
+
+    def peek(self, group_id: str) -> Roster:
+        """获取已加载的成员索引，未加载时返回 None，不触发网络请求"""
+        return self._rosters.get(str(group_id))
+
+    def forget(self, group_id: str):
+        """丢弃群成员索引，下次使用时重新加载"""
+        self._rosters.pop(str(group_id), None)
+
+    def clear(self):
+        """丢弃所有群的成员索引"""
+        self._rosters.clear()
+
+    async def on_event(self, event: dict):
+        """处理 NapCat 上报事件，增量更新已加载的成员索引"""
+        post_type = event.get('post_type')
+        roster = self.peek(event.get('group_id', ''))
+        if roster is None:
+            return
+        if post_type == 'message' and event.get('message_type') == 'group':
+            roster.touch(event['user_id'], int(event.get('time') or time.time()))
+            return
+        if post_type != 'notice':
+            return
+        notice_type = event.get('notice_type')
+        user_id = event.get('user_id')
+        if notice_type == 'group_increase':
+            try:
+                info = await self.group_api.get_group_member_info(roster.group_id, str(user_id))
+                roster.upsert(Member.from_dict(info.get('data') or {'user_id': user_id}))
+            except Exception:
+                roster.upsert(Member(int(user_id), join_time=int(event.get('time') or 0)))
+        elif notice_type == 'group_decrease':
+            if event.get('sub_type') == 'kick_me':
+                self.forget(roster.group_id)
+            else:
+                roster.remove(user_id)
+        elif notice_type == 'group_admin':
+            roster.set_role(user_id, "admin" if event.get('sub_type') == 'set' else "member")
+        elif notice_type == 'group_card':
+            member = roster.get(user_id)
+            if member is not None:
+                member.rename(event.get('card_new') or "")
@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import re
+import time
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+DURATION_PATTERN = re.compile(r"(\d+)([smhd])")
+
+
+def parse_duration(text: str) -> int:
+    """解析时长，如 30s、10m、2h、1d12h，返回秒数"""
+    text = text.lower()
+    if not text or DURATION_PATTERN.sub("", text):
+        raise ValueError(f"无效的时长 {text}，示例: 30s、10m、2h、1d12h")
+    return sum(int(n) * DURATION_UNITS[unit] for n, unit in DURATION_PATTERN.findall(text))
+
+
+def parse_time(text: str, now: float = None) -> float:
+    """
+    解析执行时间，返回时间戳。支持相对时长（10m、2h）、当天时刻（HH:MM，已过则为次日）
+    和完整时间（YYYY-MM-DDTHH:MM，不能早于当前时间）。
+    """
+    now = time.time() if now is None else now
+    try:
+        if "T" in text:
+            due = time.mktime(time.strptime(text, "%Y-%m-%dT%H:%M"))
+        elif ":" in text:
+            clock = time.strptime(text, "%H:%M")
+            today = time.localtime(now)
+            due = time.mktime((today.tm_year, today.tm_mon, today.tm_mday, clock.tm_hour, clock.tm_min, 0, 0, 0, -1))
+            return due if due > now else due + 86400
+        else:
+            due = None
+    except ValueError:
+        raise ValueError(f"无效的时间 {text}，示例: 10m、21:30、2025-01-01T08:00")
+    if due is None:
+        return now + parse_duration(text)
+    if due <= now:
+        raise ValueError(f"时间 {text} 已经过去，请指定将来的时间")
+    return due
+
+
+class ScheduledJob:
+    """定时任务：到期后按 action 执行，interval 大于 0 时为周期任务"""
+    __slots__ = ("id", "group_id", "action", "due", "interval", "payload", "creator")
+
+    def __init__(self, job_id: int, group_id: str, action: str, due: float, interval: int, payload: dict, creator: int):
+        self.id = job_id
+        self.group_id = group_id
+        self.action = action
+        self.due = due
+        self.interval = interval
+        self.payload = payload
+        self.creator = creator
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScheduledJob":
+        return cls(data["id"], data["group_id"], data["action"], data["due"], data["interval"], data["payload"], data["creator"])
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Scheduler:
+    """
+    定时任务调度器。所有任务放在一个按到期时间排序的堆中，由单个后台任务等待最早到期的任务，
+    新任务更早到期时才唤醒，不为每个任务创建睡眠协程。取消采用惰性删除，出堆时跳过。
+    任务保存在 JSON 文件中，变更后延迟合并写入，重启后恢复；错过的单次任务立即执行，周期任务顺延到下一次。
+    """
+
+    def __init__(self, execute, path: str, max_jobs: int = 10000, concurrency: int = 5, save_delay: float = 1):
+        self.execute = execute  # async (ScheduledJob)
+        self.path = path
+        self.max_jobs = max_jobs
+        self.save_delay = save_delay
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._jobs = {}  # id -> ScheduledJob
+        self._heap = []  # (due, id)
+        self._ids = itertools.count(1)
+        self._wake = asyncio.Event()
+        self._task = None
+        self._save_task = None
+        self._dirty = False
+        self._running = set()
+        self.executed = 0
+        self.failed = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            jobs = await loop.run_in_executor(None, self._read)
+        except Exception as e:
+            print(f"读取定时任务失败: {str(e)}")
+            jobs = []
+        now = time.time()
+        for data in jobs:
+            try:
+                job = ScheduledJob.from_dict(data)
+            except (KeyError, TypeError):
+                print(f"忽略无效的定时任务: {data}")
+                continue
+            if job.interval and job.due <= now:
+                # 周期任务错过的执行不补发，顺延到下一次
+                job.due += ((now - job.due) // job.interval + 1) * job.interval
+            self._push(job)
+        self._ids = itertools.count(max(self._jobs, default=0) + 1)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        for task in (self._task, self._save_task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._task, self._save_task) if t is not None), return_exceptions=True)
+        self._task = self._save_task = None
+        # 取消到期但未执行完的任务，不等待 NapCat 调用全部完成
+        for task in self._running:
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, self._snapshot())
+
+    def add(self, group_id: str, action: str, due: float, payload: dict, creator: int, interval: int = 0) -> ScheduledJob:
+        if len(self._jobs) >= self.max_jobs:
+            raise Exception(f"定时任务数已达上限（{self.max_jobs}）")
+        job = ScheduledJob(next(self._ids), group_id, action, due, interval, payload, creator)
+        self._push(job)
+        self._changed()
+        return job
+
+    def cancel(self, job_id: int, group_id: str = None) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or (group_id is not None and job.group_id != group_id):
+            return False
+        del self._jobs[job_id]
+        # 堆中的条目在出堆时跳过；取消过多时重建堆
+        if len(self._heap) > 2 * len(self._jobs) + 64:
+            self._heap = [(j.due, j.id) for j in self._jobs.values()]
+            heapq.heapify(self._heap)
+        self._changed()
+        return True
+
+    def jobs(self, group_id: str = None) -> list:
+        """按到期时间返回任务，可按群过滤"""
+        jobs = self._jobs.values()
+        if group_id is not None:
+            jobs = (j for j in jobs if j.group_id == group_id)
+        return sorted(jobs, key=lambda j: j.due)
+
+    def _push(self, job: ScheduledJob):
+        self._jobs[job.id] = job
+        heapq.heappush(self._heap, (job.due, job.id))
+        if self._heap[0][1] == job.id:
+            # 新任务成为最早到期的任务，唤醒调度循环重新计算等待时间
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, job_id = heapq.heappop(self._heap)
+                job = self._jobs.get(job_id)
+                if job is None or job.due != due:
+                    continue  # 已取消
+                if job.interval:
+                    job.due = due + job.interval
+                    if job.due <= now:
+                        job.due += ((now - job.due) // job.interval + 1) * job.interval
+                    heapq.heappush(self._heap, (job.due, job.id))
+                else:
+                    del self._jobs[job_id]
+                self._changed()
+                task = asyncio.create_task(self._execute(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            self._wake.clear()
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: ScheduledJob):
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            # 关闭时尚未开始执行的单次任务放回列表，保存后下次启动时执行
+            if not job.interval:
+                self._jobs[job.id] = job
+            raise
+        try:
+            await self.execute(job)
+            self.executed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"定时任务 #{job.id} {job.action} 执行失败: {str(e)}")
+        finally:
+            self._semaphore.release()
+
+    def _changed(self):
+        """标记任务已变更，延迟合并写入文件"""
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            await asyncio.sleep(self.save_delay)
+            self._dirty = False
+            try:
+                await loop.run_in_executor(None, self._write, self._snapshot())
+            except Exception as e:
+                print(f"保存定时任务失败: {str(e)}")
+
+    def _snapshot(self) -> list:
+        return [job.to_dict() for job in self._jobs.values()]
+
+    def _read(self) -> list:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write(self, jobs: list):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 先写临时文件再原子替换，避免写到一半时重启丢失全部任务
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(jobs, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> dict:
+        return {"pending": len(self._jobs), "running": len(self._running), "executed": self.executed, "failed": self.failed}
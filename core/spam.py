@@ -0,0 +1,139 @@
+import random
+import re
+import time
+from collections import OrderedDict, deque
+
+# 只保留文字和数字参与指纹计算，忽略空白、标点和表情
+NOISE_PATTERN = re.compile(r"[^\w]|_", re.UNICODE)
+NUM_PERM = 16  # MinHash 签名长度
+BAND_ROWS = 2  # LSH 每段的签名行数，共 NUM_PERM // BAND_ROWS 段
+_random = random.Random(20240601)
+MASK = (1 << 64) - 1
+# 以随机掩码异或字符串哈希代替独立的哈希函数，每个特征只需一次 hash()
+SALTS = [_random.getrandbits(64) for _ in range(NUM_PERM)]
+
+
+def normalize(text: str) -> str:
+    return NOISE_PATTERN.sub("", text).lower()
+
+
+def minhash(text: str, shingle: int = 3) -> tuple:
+    """计算文本字符 n-gram 集合的 MinHash 签名，两条签名相同位置相等的比例估计 Jaccard 相似度"""
+    hashes = {hash(text[i:i + shingle]) & MASK for i in range(max(1, len(text) - shingle + 1))}
+    return tuple(min(h ^ salt for h in hashes) for salt in SALTS)
+
+
+class _Entry:
+    """窗口内的一条消息签名"""
+    __slots__ = ("signature", "time", "user_id", "message_id", "keys", "flagged")
+
+    def __init__(self, signature: tuple, now: float, user_id: int, message_id, keys: tuple):
+        self.signature = signature
+        self.time = now
+        self.user_id = user_id
+        self.message_id = message_id
+        self.keys = keys
+        self.flagged = False
+
+
+class _GroupIndex:
+    """单个群最近消息的签名索引：按时间排列的队列加 LSH 分段桶"""
+    __slots__ = ("entries", "buckets")
+
+    def __init__(self):
+        self.entries = deque()
+        self.buckets = {}  # 分段键 -> {_Entry}
+
+
+class SpamDetector:
+    """
+    复制粘贴刷广告检测。每条消息计算 MinHash 签名，与本群 window 秒内的消息比较，
+    估计的相似度不低于 similarity 视为相同内容；来自 min_senders 个不同成员时判定为刷广告。
+    签名分段建立 LSH 索引，只与至少一段完全相同的候选比较，查找不随窗口大小线性增长。
+    已判定的内容在窗口内保留，之后出现的相似消息直接判定。
+    """
+
+    def __init__(self, window: float = 60, min_senders: int = 3, similarity: float = 0.6, min_length: int = 15,
+                 max_entries: int = 500, max_groups: int = 1000, mute_duration: int = 0):
+        self.window = window
+        self.min_senders = max(2, min_senders)
+        self.min_matches = max(1, round(similarity * NUM_PERM))  # 签名中至少相等的位置数
+        self.min_length = min_length
+        self.max_entries = max_entries
+        self.max_groups = max_groups
+        self.mute_duration = mute_duration  # 判定后禁言发送者的秒数，0 表示只撤回
+        self._groups = OrderedDict()  # group_id -> _GroupIndex，最近活跃的在末尾
+        self.detected = 0
+
+    def check(self, group_id: str, user_id: int, message_id, text: str, now: float = None) -> list:
+        """
+        记录一条消息。判定为刷广告时返回需要处理的 (user_id, message_id) 列表，
+        首次判定时包含窗口内所有相似消息，之后只包含当前消息；否则返回空列表。
+        """
+        text = normalize(text)
+        if len(text) < self.min_length:
+            return []
+        now = time.monotonic() if now is None else now
+        index = self._groups.get(group_id)
+        if index is None:
+            index = self._groups[group_id] = _GroupIndex()
+            if len(self._groups) > self.max_groups:
+                self._groups.popitem(last=False)
+        else:
+            self._groups.move_to_end(group_id)
+        self._expire(index, now)
+
+        signature = minhash(text)
+        keys = tuple((i, signature[i:i + BAND_ROWS]) for i in range(0, NUM_PERM, BAND_ROWS))
+        candidates = set()
+        for key in keys:
+            bucket = index.buckets.get(key)
+            if bucket:
+                candidates.update(bucket)
+        similar = [
+            e for e in candidates
+            if sum(x == y for x, y in zip(e.signature, signature)) >= self.min_matches
+        ]
+        entry = _Entry(signature, now, user_id, message_id, keys)
+        self._add(index, entry)
+
+        if any(e.flagged for e in similar):
+            entry.flagged = True
+            return [(user_id, message_id)]
+        senders = {e.user_id for e in similar}
+        senders.add(user_id)
+        if len(senders) < self.min_senders:
+            return []
+        self.detected += 1
+        hits = sorted(similar, key=lambda e: e.time) + [entry]
+        for e in hits:
+            e.flagged = True
+        return [(e.user_id, e.message_id) for e in hits]
+
+    def _add(self, index: _GroupIndex, entry: _Entry):
+        index.entries.append(entry)
+        for key in entry.keys:
+            index.buckets.setdefault(key, set()).add(entry)
+        if len(index.entries) > self.max_entries:
+            self._remove(index, index.entries.popleft())
+
+    def _expire(self, index: _GroupIndex, now: float):
+        entries = index.entries
+        while entries and now - entries[0].time > self.window:
+            self._remove(index, entries.popleft())
+
+    @staticmethod
+    def _remove(index: _GroupIndex, entry: _Entry):
+        for key in entry.keys:
+            bucket = index.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry)
+                if not bucket:
+                    del index.buckets[key]
+
+    def stats(self) -> dict:
+        return {
+            "groups": len(self._groups),
+            "messages": sum(len(i.entries) for i in self._groups.values()),
+            "detected": self.detected
+        }
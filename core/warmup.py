@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import time
+
+
+class Warmup:
+    """
+    启动预热。等待各后端首轮健康检查（建立连接、获取群列表），
+    再为最近活跃的群预取群信息与成员列表，填充接口缓存和成员索引，使重启后的首条命令无需冷启动。
+    群的活跃时间在每条群消息上更新，每 save_interval 秒及卸载时写入 path，下次启动据此选出最多 max_groups 个群。
+    """
+
+    def __init__(self, backends, group_api, roster, path: str, max_groups: int = 20, concurrency: int = 4,
+                 active_within: float = 7 * 86400, timeout: float = 30, save_interval: float = 300):
+        self.backends = backends
+        self.group_api = group_api
+        self.roster = roster
+        self.path = path
+        self.max_groups = max_groups
+        self.concurrency = concurrency
+        self.active_within = active_within
+        self.timeout = timeout
+        self.save_interval = save_interval
+        self._activity = {}  # group_id -> 最近一条消息的时间
+        self._loaded = False  # 已合并上次保存的记录，之后才能覆盖写入
+        self.state = "pending"
+        self.total = 0
+        self.done = 0
+        self.failed = []  # (group_id, 错误信息)
+        self.started = 0.0
+        self.finished = 0.0
+
+    def touch(self, group_id: str):
+        self._activity[group_id] = time.time()
+
+    async def run(self):
+        """执行一次预热，进度记录在实例属性中，单个群失败不影响其它群"""
+        self.state, self.done, self.failed = "running", 0, []
+        self.started, self.finished = time.time(), 0.0
+        loop = asyncio.get_running_loop()
+        try:
+            saved = await loop.run_in_executor(None, self._read)
+        except Exception as e:
+            print(f"读取群活跃记录失败: {str(e)}")
+            saved = {}
+        for group_id, timestamp in saved.items():
+            if timestamp > self._activity.get(group_id, 0):
+                self._activity[group_id] = timestamp
+        self._loaded = True
+        try:
+            await asyncio.wait_for(self.backends.checked.wait(), self.timeout)
+        except asyncio.TimeoutError:
+            print("预热: 等待 NapCat 后端首轮健康检查超时")
+        groups = self.recent_groups()
+        self.total = len(groups)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(group_id):
+            async with semaphore:
+                try:
+                    await self.group_api.get_group_info(group_id)
+                    await self.roster.get(group_id)
+                except Exception as e:
+                    self.failed.append((group_id, str(e)))
+                self.done += 1
+
+        await asyncio.gather(*(one(group_id) for group_id in groups))
+        self.state = "done"
+        self.finished = time.time()
+        print(f"预热完成: {self.total} 个群，失败 {len(self.failed)}，耗时 {self.finished - self.started:.1f} 秒")
+
+    def recent_groups(self) -> list:
+        """最近 active_within 秒内有消息、且机器人仍在其中的群，按活跃时间倒序"""
+        cutoff = time.time() - self.active_within
+        joined = set().union(*(b.groups for b in self.backends.backends))
+        groups = sorted(
+            (g for g, t in self._activity.items() if t >= cutoff and (not joined or g in joined)),
+            key=lambda g: self._activity[g], reverse=True
+        )
+        return groups[:self.max_groups]
+
+    async def save_loop(self):
+        """定期保存活跃记录，插件异常退出时最多丢失 save_interval 秒的记录"""
+        while True:
+            await asyncio.sleep(self.save_interval)
+            await self.save()
+
+    async def close(self):
+        await self.save()
+
+    async def save(self):
+        if not self._loaded:
+            # 尚未读取上次的记录，写入会覆盖其中的群
+            return
+        cutoff = time.time() - self.active_within
+        activity = {g: t for g, t in self._activity.items() if t >= cutoff}
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, activity)
+        except Exception as e:
+            print(f"保存群活跃记录失败: {str(e)}")
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, activity: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(activity, f)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> dict:
+        elapsed = (self.finished or time.time()) - self.started if self.started else 0.0
+        return {
+            "state": self.state,
+            "total": self.total,
+            "done": self.done,
+            "failed": len(self.failed),
+            "elapsed": elapsed,
+            "tracked": len(self._activity)
+        }
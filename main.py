@@ -1,377 +1,482 @@
 from pkg.plugin.context import register, handler, llm_func, BasePlugin, APIHost, EventContext
 from pkg.plugin.events import *
 from pkg.platform.types import *
+import asyncio
+import time
 import yaml
+from plugins.GroupManagerPlugin.api.backends import Backend, BackendPool
+from plugins.GroupManagerPlugin.api.cache import TTLCache
 from plugins.GroupManagerPlugin.api.group import GroupAPI
 from plugins.GroupManagerPlugin.api.message import MessageAPI
+from plugins.GroupManagerPlugin.api.resilience import ResilientTransport
+from plugins.GroupManagerPlugin.api.transport import HttpTransport
+from plugins.GroupManagerPlugin.api.websocket import WebSocketTransport
+from plugins.GroupManagerPlugin.core.audit import AuditLog
+from plugins.GroupManagerPlugin.core.batch import run_batch, describe_failures
+from plugins.GroupManagerPlugin.core.broadcast import BroadcastManager
+from plugins.GroupManagerPlugin.core.commands import CommandContext, load_commands
+from plugins.GroupManagerPlugin.core.config import ConfigManager, PermissionIndex, parse_config
+from plugins.GroupManagerPlugin.core.flood import FloodGuard
+from plugins.GroupManagerPlugin.core.jobs import JobQueue
+from plugins.GroupManagerPlugin.core.join_requests import JoinRequestEngine, JoinRequest
+from plugins.GroupManagerPlugin.core.keyword_filter import KeywordFilter
+from plugins.GroupManagerPlugin.core.media import MediaCache
+from plugins.GroupManagerPlugin.core.metrics import Metrics, MeteredTransport
+from plugins.GroupManagerPlugin.core.ocr import OcrCache
+from plugins.GroupManagerPlugin.core.outbox import SendScheduler
+from plugins.GroupManagerPlugin.core.roster import RosterManager
+from plugins.GroupManagerPlugin.core.scheduler import Scheduler, ScheduledJob
+from plugins.GroupManagerPlugin.core.spam import SpamDetector
+from plugins.GroupManagerPlugin.core.warmup import Warmup
+
+CONFIG_PATH = "plugins/GroupManagerPlugin/settings.yaml"
 
 @register(name="GroupManagerPlugin", description="基于LangBot-NapCat的QQ群管理插件，支持多种群聊管理功能", version="0.5", author="YuWan_SAMA")
 class GroupManagerPlugin(BasePlugin):
     def __init__(self, host: APIHost):
         super().__init__(host)
         self.ap = host
-        # 初始化 API 模块
-        self.group_api = GroupAPI(host="127.0.0.1", port=3000)
-        self.message_api = MessageAPI(host="127.0.0.1", port=3000)
-        # 加载配置文件
-        self.config = self.load_config()
+        # 构造时不做文件读取和网络连接：配置在 initialize 中异步加载，随后构建各组件并在后台预热
+        self.settings = ConfigManager(CONFIG_PATH, self.load_config)
+        self.settings.add_listener(self.apply_config)
+        self.ready = False
+        self.startup_errors = {}  # 组件名 -> 启动失败的原因
+        self.transport = None
+        self._config_task = None
+        self._warmup_task = None
+        self._warmup_save_task = None
+        self._metrics_task = None
+        self._background = set()
+
+    def setup(self):
+        """按已加载的配置构建传输层、接口与各功能组件，只创建对象，不做 I/O"""
+        self.config = self.settings.config
+        self.permissions = self.settings.permissions
+        # 初始化 NapCat 后端与共享传输层，多后端时按群路由
+        self.backends = self.build_backends()
+        self.transport = self.backends
+        # 接口与命令的调用统计
+        self.metrics = Metrics() if self.config["metrics"]["enable"] else None
+        if self.metrics is not None:
+            self.transport = MeteredTransport(self.transport, self.metrics)
+        cache_config = dict(self.config["cache"])
+        self.cache = TTLCache(**cache_config) if cache_config.pop("enable") else None
+        self.group_api = GroupAPI(self.transport, self.cache)
+        self.message_api = MessageAPI(self.transport)
+        # 群消息发送调度：按群/全局限速并合并确认消息
+        outbox_config = dict(self.config["outbox"])
+        self.outbox = SendScheduler(self.message_api.deliver_group_msg, **outbox_config) if outbox_config.pop("enable") else None
+        self.message_api.outbox = self.outbox
+        # 本地媒体缓存，图片、语音与群文件重复发送时无需再次下载
+        media_config = dict(self.config["media"])
+        self.media = MediaCache(**media_config) if media_config.pop("enable") else None
+        self.message_api.media = self.media
+        self.group_api.media = self.media
+        # OCR 结果缓存，批量识别时限制并发
+        ocr_config = dict(self.config["ocr"])
+        ocr_config.pop("max_images")
+        self.ocr = OcrCache(self.message_api, self.media, **ocr_config)
+        # 管理操作审计日志
+        audit_config = dict(self.config["audit"])
+        self.audit = AuditLog(**audit_config) if audit_config.pop("enable") else None
+        # 慢命令的后台任务队列
+        self.jobs = JobQueue(self.notify, **self.config["jobs"])
+        # 刷屏检测，在每条群消息上运行
+        flood_config = dict(self.config["flood"])
+        self.flood = FloodGuard(**flood_config) if flood_config.pop("enable") else None
+        # 违禁词过滤
+        filter_config = dict(self.config["keyword_filter"])
+        self.keyword_filter = KeywordFilter(**filter_config) if filter_config.pop("enable") else None
+        # 多账号复制粘贴广告检测
+        spam_config = dict(self.config["spam"])
+        self.spam = SpamDetector(**spam_config) if spam_config.pop("enable") else None
+        # 加群请求自动处理，规则随配置热加载更新
+        join_config = self.config["join_requests"]
+        self.join_requests = JoinRequestEngine(
+            self.group_api, join_config, join_config["concurrency"], join_config["profile_ttl"],
+            join_config["max_pending"], self.record_join
+        ) if join_config["enable"] else None
+        if self.join_requests is not None:
+            self.transport.add_event_listener(self.join_requests.on_event)
+        # 跨群广播，群集合随配置热加载更新
+        broadcast_config = self.config["broadcast"]
+        self.broadcasts = BroadcastManager(
+            self.group_api, self.message_api, broadcast_config["path"], broadcast_config["concurrency"],
+            broadcast_config["rate"], broadcast_config["history"], broadcast_config["group_sets"]
+        )
+        # 定时公告、提醒、解禁与踢人
+        scheduler_config = dict(self.config["scheduler"])
+        self.scheduler = Scheduler(self.run_scheduled, **scheduler_config) if scheduler_config.pop("enable") else None
+        if self.metrics is not None:
+            self.metrics.add_gauges(self.collect_gauges)
+        # 群成员索引，由 NapCat 上报事件增量更新
+        # 所有后端都有事件来源时索引由事件增量更新，否则按成员列表的缓存时长定期重新拉取
+        ttl = self.config["cache"]["ttl"] or {}
+        member_ttl = ttl.get("get_group_member_list", self.config["cache"]["default_ttl"])
+        self.roster = RosterManager(self.group_api, None if all(b.events for b in self.backends.backends) else member_ttl)
+        self.transport.add_event_listener(self.roster.on_event)
+        # 启动预热：记录各群活跃时间，重启后预取最近活跃群的数据
+        warmup_config = dict(self.config["warmup"])
+        self.warmup = Warmup(self.backends, self.group_api, self.roster, **warmup_config) if warmup_config.pop("enable") else None
+        # 加载 commands 目录下注册的子命令
+        self.commands = load_commands()
+
+    def build_backends(self) -> BackendPool:
+        """
+        为每个 NapCat 后端构建传输层：HTTP 连接池，启用时叠加 WebSocket 与超时/重试/熔断策略。
+        未配置 backends 时使用 napcat / websocket 段作为唯一后端。
+        """
+        napcat_config = self.config["napcat"]
+        ws_config = self.config["websocket"]
+        resilience_config = dict(self.config["resilience"])
+        use_resilience = resilience_config.pop("enable")
+        entries = self.config["backends"] or [{
+            "name": "default",
+            "host": napcat_config["host"],
+            "port": napcat_config["port"],
+            "ws_host": ws_config["host"],
+            "ws_port": ws_config["port"],
+            "access_token": ws_config["access_token"]
+        }]
+        backends = []
+        for entry in entries:
+            host = entry.get("host", napcat_config["host"])
+            port = entry.get("port", napcat_config["port"])
+            transport = HttpTransport(**{**napcat_config, "host": host, "port": port})
+            if ws_config["enable"] and entry.get("ws_port"):
+                # WebSocket 传输不可用时自动回退到 HTTP
+                transport = WebSocketTransport(
+                    transport,
+                    entry.get("ws_host", host),
+                    entry["ws_port"],
+                    entry.get("access_token", ws_config["access_token"]),
+                    ws_config["reconnect_interval"],
+                    ws_config["pending_policy"]
+                )
+            if use_resilience:
+                # 超时、读请求重试与熔断，每个后端独立熔断
+                transport = ResilientTransport(transport, **resilience_config)
+            backend = Backend(entry.get("name") or f"{host}:{port}", transport)
+            backend.events = ws_config["enable"] and bool(entry.get("ws_port"))
+            backends.append(backend)
+        return BackendPool(backends, **self.config["routing"])
 
     def load_config(self) -> dict:
-        """加载并验证配置文件"""
-        default_config = {"admin": []}
+        """读取并验证配置文件，格式错误时抛出异常，由 ConfigManager 保留上一次的有效配置"""
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return parse_config(yaml.safe_load(f) or {})
+
+    def apply_config(self, config: dict, permissions: PermissionIndex):
+        """配置热加载后替换当前配置与权限索引"""
+        self.config = config
+        self.permissions = permissions
+        if self.join_requests is not None:
+            self.join_requests.update_rules(config["join_requests"])
+        self.broadcasts.group_sets = config["broadcast"]["group_sets"] or {}
+
+    async def initialize(self):
+        # 插件初始化：异步加载配置并构建组件，建立共享的 NapCat 连接池，启动后台任务
+        await self.settings.load_async()
+        self.setup()
+        # 单个组件启动失败时记录错误并继续，其余功能（包括刷屏、违禁词等自动管理）照常工作
+        for name in ("transport", "jobs", "audit", "scheduler", "broadcasts", "media", "ocr", "keyword_filter"):
+            component = getattr(self, name)
+            if component is None:
+                continue
+            try:
+                await component.start()
+            except Exception as e:
+                print(f"启动 {name} 失败: {str(e)}，该功能不可用")
+                self.startup_errors[name] = str(e)
+                if name in ("audit", "scheduler", "media", "keyword_filter"):
+                    # 可选组件按未启用处理
+                    setattr(self, name, None)
+        self.message_api.media = self.group_api.media = self.ocr.media = self.media
+        reload_config = self.config["hot_reload"]
+        if reload_config["enable"]:
+            self._config_task = asyncio.create_task(self.settings.watch(reload_config["interval"]))
+        metrics_config = self.config["metrics"]
+        if self.metrics is not None and metrics_config["prometheus_file"]:
+            self._metrics_task = asyncio.create_task(
+                self.metrics.export_loop(metrics_config["prometheus_file"], metrics_config["interval"])
+            )
+        if self.warmup is not None:
+            self._warmup_task = asyncio.create_task(self.warmup.run())
+            self._warmup_save_task = asyncio.create_task(self.warmup.save_loop())
+        self.ready = True
+
+    def collect_gauges(self) -> dict:
+        """汇总缓存、发送队列、后台任务和熔断器的状态指标"""
+        gauges = {}
+        if self.cache is not None:
+            stats = self.cache.stats()
+            gauges.update(cache_entries=stats["size"], cache_hits=stats["hits"], cache_misses=stats["misses"])
+        if self.outbox is not None:
+            stats = self.outbox.stats()
+            gauges.update(outbox_depth=stats["depth"], outbox_throttled=stats["group_throttled"] + stats["global_throttled"])
+        stats = self.jobs.stats()
+        gauges.update(jobs_queued=stats["queued"], jobs_running=stats["running"])
+        if self.flood is not None:
+            stats = self.flood.stats()
+            gauges.update(flood_tracked=stats["tracked"], flood_detected=stats["detected"])
+        if self.keyword_filter is not None:
+            gauges["keyword_matched"] = self.keyword_filter.stats()["matched"]
+        if self.join_requests is not None:
+            gauges["join_requests_pending"] = self.join_requests.stats()["pending"]
+        if self.spam is not None:
+            gauges["spam_detected"] = self.spam.stats()["detected"]
+        if self.media is not None:
+            stats = self.media.stats()
+            gauges.update(media_cache_bytes=stats["bytes"], media_cache_hits=stats["hits"], media_downloads=stats["downloads"])
+        stats = self.ocr.stats()
+        gauges.update(ocr_cache_entries=stats["entries"], ocr_cache_hits=stats["hits"], ocr_cache_misses=stats["misses"])
+        if self.scheduler is not None:
+            stats = self.scheduler.stats()
+            gauges.update(scheduled_pending=stats["pending"], scheduled_failed=stats["failed"])
+        backends = self.backends.stats()
+        gauges["napcat_backends_available"] = sum(1 for b in self.backends.backends if b.available)
+        gauges["napcat_circuit_open"] = sum(1 for b in backends if b["breaker"] == "open")
+        return gauges
+
+    async def notify(self, group_id: str, text: str):
+        """向群发送一条后台通知（任务结果等）"""
+        await self.message_api.send_group_msg(group_id, MessageChain([text]))
+
+    async def respond(self, group_id: str, text: str):
+        """发送命令处理中的提示（权限不足、用法、错误信息）；NapCat 不可用时只记录日志，不向事件处理抛出异常"""
         try:
-            with open("plugins/GroupManagerPlugin/settings.yaml", "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f) or default_config
-                if not isinstance(data, dict):
-                    print("配置文件格式错误，使用默认配置")
-                    return default_config
-                # 验证 admin 字段
-                if "admin" not in data:
-                    data["admin"] = []
-                if not isinstance(data["admin"], list):
-                    print("admin 字段必须为列表，使用默认配置")
-                    data["admin"] = []
-                # 确保 admin 列表中的元素是字符串
-                data["admin"] = [int(item) for item in data["admin"]]
-                return data
-        except FileNotFoundError:
-            print("配置文件不存在，使用默认配置")
-            return default_config
+            await self.message_api.send_group_msg(group_id, MessageChain([text]))
         except Exception as e:
-            print(f"加载配置文件失败: {str(e)}")
-            return default_config
+            print(f"向群 {group_id} 发送提示失败: {str(e)}，提示内容: {text}")
 
-    async def initialize(self):
-        # 插件初始化
-        pass
+    async def run_scheduled(self, job: ScheduledJob):
+        """执行到期的定时任务，结果写入审计日志"""
+        started = time.perf_counter()
+        user_id = job.payload.get("user_id")
+        result = "成功"
+        try:
+            if job.action == "announce":
+                await self.group_api.send_group_notice(job.group_id, job.payload["text"])
+            elif job.action == "remind":
+                await self.message_api.send_group_msg(job.group_id, MessageChain([job.payload["text"]]))
+            elif job.action == "unmute":
+                await self.group_api.mute_group_member(job.group_id, user_id, 0)
+            elif job.action == "kick":
+                await self.group_api.kick_group_member(job.group_id, user_id)
+                roster = self.roster.peek(job.group_id)
+                if roster is not None:
+                    roster.remove(user_id)
+            else:
+                raise Exception(f"未知的定时任务类型 {job.action}")
+        except Exception as e:
+            result = f"错误: {str(e)}"
+            raise
+        finally:
+            if self.audit is not None:
+                self.audit.record(job.group_id, job.creator, f"schedule:{job.action}", [user_id] if user_id else [],
+                                  [f"#{job.id}"], result, time.perf_counter() - started)
+
+    def spawn(self, coro):
+        """在后台执行处罚等操作，不阻塞消息处理"""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def moderation_exempt(self, group_id: str, user_id: int, roster=None) -> bool:
+        """有命令权限的成员以及群主、群管理员不做刷屏、违禁词等自动处理"""
+        if self.permissions.is_operator(group_id, user_id):
+            return True
+        member = roster.get(user_id) if roster is not None else None
+        return member is not None and member.role in ("owner", "admin")
+
+    async def punish_flood(self, group_id: str, user_id: int, duration: int):
+        """禁言刷屏成员并通知群内"""
+        started = time.perf_counter()
+        result = "成功"
+        try:
+            await self.group_api.mute_group_member(group_id, str(user_id), duration)
+            await self.message_api.send_group_msg(
+                group_id, MessageChain([f"检测到 {user_id} 刷屏，已禁言 {duration // 60} 分钟"]), coalesce=True
+            )
+        except Exception as e:
+            result = f"错误: {str(e)}"
+            print(f"刷屏禁言 {user_id} 失败: {str(e)}")
+        if self.audit is not None:
+            self.audit.record(group_id, 0, "flood", [str(user_id)], [str(duration)], result, time.perf_counter() - started)
+
+    def record_join(self, request: JoinRequest, action: str, reason: str):
+        """加群请求的自动处理结果写入审计日志"""
+        if self.audit is not None:
+            self.audit.record(request.group_id, 0, f"join:{action}", [str(request.user_id)], [request.comment], reason, 0)
+
+    async def punish_keyword(self, group_id: str, user_id: int, message_id, pattern: str):
+        """撤回包含违禁词的消息，按配置禁言并通知群内"""
+        started = time.perf_counter()
+        config = self.keyword_filter
+        result = "成功"
+        try:
+            if message_id is not None:
+                await self.message_api.recall_group_message(group_id, message_id)
+            if config.mute_duration:
+                await self.group_api.mute_group_member(group_id, str(user_id), config.mute_duration)
+            if config.notify:
+                notice = f"{user_id} 的消息包含违禁词，已撤回"
+                if config.mute_duration:
+                    notice += f"并禁言 {config.mute_duration // 60} 分钟"
+                await self.message_api.send_group_msg(group_id, MessageChain([notice]), coalesce=True)
+        except Exception as e:
+            result = f"错误: {str(e)}"
+            print(f"处理违禁词消息失败: {str(e)}")
+        if self.audit is not None:
+            self.audit.record(group_id, 0, "keyword", [str(user_id)], [pattern], result, time.perf_counter() - started)
+
+    async def punish_spam(self, group_id: str, hits: list):
+        """批量撤回相似的广告消息，按配置禁言发送者"""
+        started = time.perf_counter()
+        concurrency = self.config["batch"]["concurrency"]
+        message_ids = [mid for _, mid in hits if mid is not None]
+        senders = list(dict.fromkeys(str(user_id) for user_id, _ in hits))
+        _, failed = await run_batch(
+            message_ids, lambda mid: self.message_api.recall_group_message(group_id, mid), concurrency
+        )
+        if self.spam.mute_duration:
+            _, mute_failed = await run_batch(
+                senders, lambda qq: self.group_api.mute_group_member(group_id, qq, self.spam.mute_duration), concurrency
+            )
+            failed += mute_failed
+        if len(hits) > 1:
+            notice = f"检测到 {len(senders)} 个账号发送相似内容，已撤回 {len(message_ids)} 条消息"
+            if self.spam.mute_duration:
+                notice += f"并禁言 {self.spam.mute_duration // 60} 分钟"
+            try:
+                await self.message_api.send_group_msg(group_id, MessageChain([notice]), coalesce=True)
+            except Exception as e:
+                print(f"发送刷广告提示失败: {str(e)}")
+        if self.audit is not None:
+            self.audit.record(group_id, 0, "spam", senders, [str(len(message_ids))],
+                              describe_failures(failed) or "成功", time.perf_counter() - started)
 
     @handler(GroupMessageReceived)
     async def group_command_sent(self, ctx: EventContext):
+        # 初始化完成前（配置尚未加载）的消息不处理
+        if not self.ready:
+            return
         event = ctx.event
-        msg = str(event.message_chain).strip()
         group_id = str(event.launcher_id)
         sender_id = int(event.sender_id)
+        if self.warmup is not None:
+            self.warmup.touch(group_id)
+
+        # 更新已加载成员索引中的发言时间
+        roster = self.roster.peek(group_id)
+        if roster is not None:
+            roster.touch(sender_id, int(time.time()))
+
+        # 刷屏检测：只有判定为刷屏时才检查豁免，正常消息只有一次环形缓冲写入
+        if self.flood is not None:
+            duration = self.flood.check(group_id, sender_id)
+            if duration and not self.moderation_exempt(group_id, sender_id, roster):
+                self.spawn(self.punish_flood(group_id, sender_id, duration))
+
+        # 违禁词过滤与刷广告检测只看文本部分
+        if self.keyword_filter is not None or self.spam is not None:
+            text = "".join(c.text for c in event.message_chain if isinstance(c, Plain))
+            message_id = next((c.id for c in event.message_chain if isinstance(c, Source)), None)
+            # 违禁词：自动机一次扫描消息文本，命中后撤回
+            pattern = self.keyword_filter.match(group_id, text) if text and self.keyword_filter is not None else None
+            if pattern is not None and not self.moderation_exempt(group_id, sender_id, roster):
+                self.spawn(self.punish_keyword(group_id, sender_id, message_id, pattern))
+                return
+            # 刷广告：多个成员发送相似内容时批量撤回
+            hits = self.spam.check(group_id, sender_id, message_id, text) if text and self.spam is not None else None
+            if hits:
+                hits = [(user_id, mid) for user_id, mid in hits if not self.moderation_exempt(group_id, user_id, roster)]
+                if hits:
+                    self.spawn(self.punish_spam(group_id, hits))
+
+        # 先对消息链做廉价的前缀检查，非命令消息不做完整的字符串化
+        if not self.commands.matches(event.message_chain):
+            return
+        msg = self.commands.command_text(event.message_chain)
 
         # 检查消息是否以 /group 开头
         if not msg.startswith("/group"):
             return
 
-        # 验证管理员权限
-        if sender_id not in self.config["admin"]:
-            await self.message_api.send_group_msg(group_id, MessageChain(["权限不足，仅管理员可执行指令"]))
+        # 验证权限：先确认发送者在本群有任一命令权限，具体命令在解析后检查
+        permissions = self.permissions
+        if not permissions.is_operator(group_id, sender_id):
+            await self.respond(group_id, "权限不足，仅管理员可执行指令")
             print(f"完整sender_id: {sender_id}")
             return
 
-        command = msg.lower().split()
-        if len(command) < 1:
-            return
-
+        command = msg.split()
         if len(command) < 2:
-            await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group [command] [参数]"]))
+            await self.respond(group_id, "使用方法: /group [command] [参数]")
             return
 
         try:
-            cmd = command[1]
-            if cmd == "help":
-                # 显示帮助信息
-                help_text = (
-                    "群管理插件命令列表:\n"
-                    "/group atall <消息> - @全体成员\n"
-                    "/group mute <QQ号> <分钟> - 禁言成员\n"
-                    "/group unmute <QQ号> - 解除禁言\n"
-                    "/group announce <内容> - 发布公告\n"
-                    "/group essence <消息ID> - 设置精华消息\n"
-                    "/group essencelist - 查看群精华消息列表\n"
-                    "/group honor - 查看群荣誉信息\n"
-                    "/group info - 查看群信息\n"
-                    "/group members - 查看群成员列表\n"
-                    "/group kick <QQ号> - 踢出成员\n"
-                    "/group setadmin <QQ号> <true|false> - 设置/取消管理员\n"
-                    "/group setname <新群名> - 修改群名\n"
-                    "/group settitle <QQ号> <头衔> - 设置成员头衔\n"
-                    "/group atallcount - 查看@全体剩余次数\n"
-                    "/group mutelist - 查看禁言列表\n"
-                    "/group poke <QQ号> - 戳一戳\n"
-                    "/group like <QQ号> <次数> - 点赞\n"
-                    "/group sendimg <图片URL> - 发送图片\n"
-                    "/group sendvoice <语音URL> - 发送语音\n"
-                    "/group sendface <表情ID> - 发送系统表情\n"
-                    "/group sendjson <JSON内容> - 发送JSON消息\n"
-                    "/group reply <消息ID> <内容> - 回复消息\n"
-                    "/group recall <消息ID> - 撤回消息\n"
-                    "/group movefile <文件ID> <目标目录> - 移动群文件\n"
-                    "/group uploadfile <文件URL> - 上传群文件\n"
-                    "/group ocr <图片URL> - 图片OCR识别\n"
-                    "/group typing - 设置输入状态\n"
-                    "/group sendtext <内容> - 发送纯文本消息\n"
-                    "/group forward <消息1> | <消息2> | ... - 发送合并转发消息"
-                )
-                await self.message_api.send_group_msg(group_id, MessageChain([help_text]))
-
-            elif cmd == "atall":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group atall <消息内容>"]))
-                    return
-                await self.message_api.send_group_msg(group_id, MessageChain([
-                    AtAll(),
-                    Plain(" ".join(command[2:]))
-                ]))
-
-            elif cmd == "mute":
-                if len(command) < 4:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group mute <QQ号> <分钟>"]))
-                    return
-                target_qq = command[2]
-                duration = int(command[3]) * 60  # 转换为秒
-                await self.group_api.mute_group_member(group_id, target_qq, duration)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"已禁言 {target_qq} {command[3]}分钟"]))
-
-            elif cmd == "unmute":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group unmute <QQ号>"]))
-                    return
-                target_qq = command[2]
-                await self.group_api.mute_group_member(group_id, target_qq, 0)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"已解除 {target_qq} 的禁言"]))
-
-            elif cmd == "announce":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group announce <公告内容>"]))
-                    return
-                content = " ".join(command[2:])
-                await self.group_api.send_group_notice(group_id, content)
-                await self.message_api.send_group_msg(group_id, MessageChain(["公告已发布"]))
-
-            elif cmd == "essence":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group essence <消息ID>"]))
-                    return
-                message_id = command[2]
-                await self.group_api.set_essence_message(group_id, message_id)
-                await self.message_api.send_group_msg(group_id, MessageChain(["已设置群精华消息"]))
-
-            elif cmd == "essencelist":
-                essence_list = await self.group_api.get_essence_msg_list(group_id)
-                if not essence_list.get('data'):
-                    await self.message_api.send_group_msg(group_id, MessageChain(["当前群无精华消息"]))
-                    return
-                essence_msgs = [
-                    f"消息ID: {m['message_id']}, 发送者: {m['sender_id']} ({m['nickname']}), 时间: {m['description']}"
-                    for m in essence_list['data'][:10]  # 限制显示前10条
-                ]
-                essence_str = "\n".join(essence_msgs)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"群精华消息列表（前10条）:\n{essence_str}"]))
-
-            elif cmd == "honor":
-                honor_info = await self.group_api.get_group_honor_info(group_id)
-                honor_data = honor_info.get('data', {})
-                honor_msg = []
-                if honor_data.get('talkative_list'):
-                    talkative = honor_data['talkative_list'][0]
-                    honor_msg.append(f"龙王: {talkative['user_id']} ({talkative['nickname']})")
-                if honor_data.get('performer_list'):
-                    performer = honor_data['performer_list'][0]
-                    honor_msg.append(f"群聊之火: {performer['user_id']} ({performer['nickname']})")
-                if honor_data.get('legend_list'):
-                    legend = honor_data['legend_list'][0]
-                    honor_msg.append(f"群聊炽焰: {legend['user_id']} ({legend['nickname']})")
-                if honor_data.get('strong_newbie_list'):
-                    newbie = honor_data['strong_newbie_list'][0]
-                    honor_msg.append(f"冒尖小春笋: {newbie['user_id']} ({newbie['nickname']})")
-                if honor_data.get('emotion_list'):
-                    emotion = honor_data['emotion_list'][0]
-                    honor_msg.append(f"快乐源泉: {emotion['user_id']} ({emotion['nickname']})")
-                honor_str = "\n".join(honor_msg) if honor_msg else "暂无群荣誉信息"
-                await self.message_api.send_group_msg(group_id, MessageChain([f"群荣誉信息:\n{honor_str}"]))
-
-            elif cmd == "info":
-                group_info = await self.group_api.get_group_info(group_id)
-                info_msg = (
-                    f"群ID: {group_info['group_id']}\n"
-                    f"群名: {group_info['group_name']}\n"
-                    f"成员数: {group_info['member_count']}\n"
-                    f"最大成员数: {group_info['max_member_count']}"
-                )
-                await self.message_api.send_group_msg(group_id, MessageChain([info_msg]))
-
-            elif cmd == "members":
-                member_list = await self.group_api.get_group_member_list(group_id)
-                members = [f"{m['user_id']} ({m['nickname']})" for m in member_list['data']]
-                members_str = "\n".join(members[:20])  # 限制显示前20个成员
-                await self.message_api.send_group_msg(group_id, MessageChain([f"群成员（前20个）:\n{members_str}"]))
-
-            elif cmd == "kick":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group kick <QQ号>"]))
-                    return
-                target_qq = command[2]
-                await self.group_api.kick_group_member(group_id, target_qq)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"已踢出 {target_qq}"]))
-
-            elif cmd == "setadmin":
-                if len(command) < 4:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group setadmin <QQ号> <true|false>"]))
-                    return
-                target_qq = command[2]
-                enable = command[3].lower() == "true"
-                await self.group_api.set_group_admin(group_id, target_qq, enable)
-                action = "设置" if enable else "取消"
-                await self.message_api.send_group_msg(group_id, MessageChain([f"已{action} {target_qq} 的管理员权限"]))
-
-            elif cmd == "setname":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group setname <新群名>"]))
-                    return
-                new_name = " ".join(command[2:])
-                await self.group_api.set_group_name(group_id, new_name)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"群名已修改为 {new_name}"]))
-
-            elif cmd == "settitle":
-                if len(command) < 4:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group settitle <QQ号> <头衔>"]))
-                    return
-                target_qq = command[2]
-                title = " ".join(command[3:])
-                await self.group_api.set_group_special_title(group_id, target_qq, title)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"已为 {target_qq} 设置头衔: {title}"]))
-
-            elif cmd == "atallcount":
-                at_all_info = await self.group_api.get_group_at_all_remain(group_id)
-                remain = at_all_info.get('data', {}).get('remain', 0)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"群@全体剩余次数: {remain}"]))
-
-            elif cmd == "mutelist":
-                mute_list = await self.group_api.get_group_shut_list(group_id)
-                muted = [f"{m['user_id']} ({m['nickname']})" for m in mute_list['data'] if m['shut_up_timestamp'] > 0]
-                mute_str = "\n".join(muted[:20]) if muted else "无禁言成员"
-                await self.message_api.send_group_msg(group_id, MessageChain([f"群禁言列表（前20个）:\n{mute_str}"]))
-
-            elif cmd == "poke":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group poke <QQ号>"]))
-                    return
-                target_qq = command[2]
-                await self.group_api.send_group_poke(group_id, target_qq)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"已戳一戳 {target_qq}"]))
-
-            elif cmd == "like":
-                if len(command) < 4:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group like <QQ号> <次数>"]))
-                    return
-                target_qq = command[2]
-                times = int(command[3])
-                await self.group_api.send_like(target_qq, times)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"已为 {target_qq} 点赞 {times} 次"]))
-
-            elif cmd == "sendimg":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group sendimg <图片URL>"]))
-                    return
-                image_url = command[2]
-                await self.message_api.send_group_image(group_id, image_url)
-                await self.message_api.send_group_msg(group_id, MessageChain(["图片已发送"]))
-
-            elif cmd == "sendvoice":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group sendvoice <语音URL>"]))
-                    return
-                voice_url = command[2]
-                await self.message_api.send_group_voice(group_id, voice_url)
-                await self.message_api.send_group_msg(group_id, MessageChain(["语音已发送"]))
-
-            elif cmd == "sendface":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group sendface <表情ID>"]))
-                    return
-                face_id = command[2]
-                await self.message_api.send_group_msg(group_id, face_id)
-                await self.message_api.send_group_msg(group_id, MessageChain(["系统表情已发送"]))
-
-            elif cmd == "sendjson":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group sendjson <JSON内容>"]))
-                    return
-                json_content = " ".join(command[2:])
-                await self.message_api.send_group_json(group_id, json_content)
-                await self.message_api.send_group_msg(group_id, MessageChain(["JSON消息已发送"]))
-
-            elif cmd == "reply":
-                if len(command) < 4:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group reply <消息ID> <内容>"]))
-                    return
-                message_id = command[2]
-                content = " ".join(command[3:])
-                await self.message_api.send_group_reply(group_id, message_id, content)
-                await self.message_api.send_group_msg(group_id, MessageChain(["回复消息已发送"]))
-
-            elif cmd == "recall":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group recall <消息ID>"]))
-                    return
-                message_id = command[2]
-                await self.message_api.recall_group_message(group_id, message_id)
-                await self.message_api.send_group_msg(group_id, MessageChain(["消息已撤回"]))
-
-            elif cmd == "movefile":
-                if len(command) < 4:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group movefile <文件ID> <目标目录>"]))
-                    return
-                file_id = command[2]
-                target_dir = command[3]
-                await self.group_api.move_group_file(group_id, file_id, target_dir)
-                await self.message_api.send_group_msg(group_id, MessageChain(["群文件已移动"]))
-
-            elif cmd == "uploadfile":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group uploadfile <文件URL>"]))
-                    return
-                file_url = command[2]
-                await self.group_api.upload_group_file(group_id, file_url)
-                await self.message_api.send_group_msg(group_id, MessageChain(["群文件已上传"]))
-
-            elif cmd == "ocr":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group ocr <图片URL>"]))
-                    return
-                image_url = command[2]
-                ocr_result = await self.message_api.ocr_image(image_url)
-                await self.message_api.send_group_msg(group_id, MessageChain([f"OCR识别结果:\n{ocr_result}"]))
-
-            elif cmd == "typing":
-                await self.group_api.set_typing_status(group_id)
-                await self.message_api.send_group_msg(group_id, MessageChain(["已设置输入状态"]))
-
-            elif cmd == "sendtext":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group sendtext <内容>"]))
-                    return
-                content = " ".join(command[2:])
-                await self.message_api.send_group_text(group_id, content)
-                await self.message_api.send_group_msg(group_id, MessageChain(["文本消息已发送"]))
-
-            elif cmd == "forward":
-                if len(command) < 3:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["使用方法: /group forward <消息1> | <消息2> | ..."]))
-                    return
-                # 将命令参数按 | 分割为多条消息
-                messages = " ".join(command[2:]).split("|")
-                messages = [msg.strip() for msg in messages if msg.strip()]  # 去除空消息
-                if not messages:
-                    await self.message_api.send_group_msg(group_id, MessageChain(["请提供至少一条消息"]))
-                    return
-                await self.message_api.send_group_forward_message(group_id, messages, sender_id)
-                await self.message_api.send_group_msg(group_id, MessageChain(["合并转发消息已发送"]))
-
-            else:
-                supported = (
-                    "help, atall, mute, unmute, announce, essence, essencelist, honor, info, members, kick, setadmin, "
-                    "setname, settitle, atallcount, mutelist, poke, like, sendimg, sendvoice, "
-                    "sendface, sendjson, reply, recall, movefile, uploadfile, ocr, typing, sendtext, forward"
-                )
-                await self.message_api.send_group_msg(group_id, MessageChain([f"未知命令。支持: {supported}"]))
-
+            cmd = self.commands.get(command[1].lower())
+            if cmd is None:
+                supported = ", ".join(self.commands.names())
+                await self.respond(group_id, f"未知命令。支持: {supported}")
+                return
+            if cmd.name != "help" and not permissions.allowed(group_id, sender_id, cmd.name):
+                await self.respond(group_id, f"权限不足，无权执行 {cmd.name}")
+                return
+            args = command[2:]
+            if len(args) < cmd.min_args:
+                await self.respond(group_id, f"使用方法: {cmd.usage}")
+                return
+            context = CommandContext(self, event, group_id, sender_id, args)
+            started = time.perf_counter()
+            try:
+                if self.metrics is not None:
+                    with self.metrics.track("command", cmd.name):
+                        await cmd.handler(context)
+                else:
+                    await cmd.handler(context)
+            except Exception as e:
+                if cmd.audit and context.audit and self.audit is not None:
+                    self.audit.record(group_id, sender_id, cmd.name, context.targets, args,
+                                      f"错误: {str(e)}", time.perf_counter() - started)
+                raise
+            if cmd.audit and context.audit and self.audit is not None:
+                self.audit.record(group_id, sender_id, cmd.name, context.targets, args,
+                                  context.result or "成功", time.perf_counter() - started)
         except Exception as e:
-            await self.message_api.send_group_msg(group_id, MessageChain([f"错误: {str(e)}"]))
+            await self.respond(group_id, f"错误: {str(e)}")
+
+    async def destroy(self):
+        # 插件卸载时停止后台任务，发送完队列中的消息并关闭共享连接池
+        if self.transport is None:
+            return
+        await self.jobs.close()
+        await self.broadcasts.close()
+        if self._config_task is not None:
+            self._config_task.cancel()
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+        if self._warmup_save_task is not None:
+            self._warmup_save_task.cancel()
+        if self.warmup is not None:
+            await self.warmup.close()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self.outbox is not None:
+            await self.outbox.close()
+        if self.scheduler is not None:
+            await self.scheduler.close()
+        if self.keyword_filter is not None:
+            await self.keyword_filter.close()
+        if self.audit is not None:
+            await self.audit.close()
+        await self.ocr.close()
+        if self.media is not None:
+            await self.media.close()
+        await self.transport.close()
 
     def __del__(self):
         # 清理资源